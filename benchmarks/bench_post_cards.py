@@ -0,0 +1,70 @@
+"""
+Время рендера posts/index.html с холодным и тёплым кэшем карточек.
+
+    python -m benchmarks.bench_post_cards --posts 1000 --repeat 200
+"""
+import argparse
+
+from benchmarks.utils import measure, report, setup_django, test_database
+
+
+def seed(posts_total):
+    from posts.models import Group, Post, User
+
+    User.objects.bulk_create(
+        User(username=f'author{number}', first_name='Имя', last_name='Автор')
+        for number in range(10)
+    )
+    Group.objects.bulk_create(
+        Group(title=f'Группа {number}', slug=f'group-{number}',
+              description='Описание')
+        for number in range(5)
+    )
+    authors = list(User.objects.order_by('pk'))
+    groups = list(Group.objects.order_by('pk'))
+    Post.objects.bulk_create(
+        Post(
+            text=f'Текст поста номер {number} ' * 5,
+            author=authors[number % len(authors)],
+            group=groups[number % len(groups)],
+        )
+        for number in range(posts_total)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=200)
+    options = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import AnonymousUser
+    from django.core.cache import cache
+    from django.template.loader import render_to_string
+    from django.test import RequestFactory
+
+    from posts.models import Post
+    from posts.views import paginate_queryset
+
+    with test_database():
+        seed(options.posts)
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        posts = Post.objects.select_related('group', 'author')
+        page_obj = paginate_queryset(posts, request)
+        list(page_obj)
+        context = {'posts': posts, 'page_obj': page_obj}
+
+        def render():
+            render_to_string('posts/index.html', context, request)
+
+        render()
+        report('index.html cold card cache',
+               measure(render, options.repeat, before=cache.clear))
+        render()
+        report('index.html warm card cache', measure(render, options.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Авторизованная главная страница с разными движками сессий: запросов
+в секунду и обращений к django_session на запрос.
+
+    python -m benchmarks.bench_sessions --posts 1000 --requests 500
+"""
+import argparse
+import time
+
+from benchmarks.bench_post_cards import seed
+from benchmarks.utils import report, setup_django, test_database
+
+ENGINES = (
+    ('db', 'django.contrib.sessions.backends.db', False),
+    ('db, save every request', 'django.contrib.sessions.backends.db', True),
+    ('core.sessions', 'core.sessions', True),
+    ('signed_cookies', 'django.contrib.sessions.backends.signed_cookies',
+     True),
+)
+
+
+def run(label, engine, save_every_request, user, requests):
+    from django.db import connection
+    from django.test import Client, override_settings
+    from django.test.utils import CaptureQueriesContext
+
+    with override_settings(
+        SESSION_ENGINE=engine, SESSION_SAVE_EVERY_REQUEST=save_every_request
+    ):
+        client = Client()
+        client.force_login(user)
+        client.get('/')
+        timings = []
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(requests):
+                start = time.perf_counter()
+                client.get('/')
+                timings.append(time.perf_counter() - start)
+    session_queries = sum(
+        'django_session' in query['sql'] for query in queries
+    )
+    report(label, timings)
+    print(
+        f'{"":<32} {requests / sum(timings):8.0f} req/s  '
+        f'{session_queries / requests:.2f} session queries per request'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=500)
+    options = parser.parse_args()
+
+    setup_django()
+    from posts.models import User
+
+    with test_database():
+        seed(options.posts)
+        user = User.objects.first()
+        for label, engine, save_every_request in ENGINES:
+            run(label, engine, save_every_request, user, options.requests)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Смешанная нагрузка чтение/запись на SQLite-файл: профиль соединения
+по умолчанию против SQLITE_PRAGMAS из настроек (WAL, mmap, busy_timeout).
+
+    python -m benchmarks.bench_sqlite_concurrency --readers 8 --writers 2
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from benchmarks.utils import setup_django, summary
+
+SCHEMA = (
+    'CREATE TABLE post ('
+    'id INTEGER PRIMARY KEY, pub_date REAL NOT NULL, text TEXT NOT NULL)'
+)
+READ = 'SELECT id, text FROM post ORDER BY pub_date DESC LIMIT 10'
+WRITE = 'INSERT INTO post (pub_date, text) VALUES (?, ?)'
+
+
+def prepare(path, rows):
+    connection = sqlite3.connect(path)
+    connection.execute(SCHEMA)
+    connection.execute('CREATE INDEX post_pub_date ON post (pub_date)')
+    connection.executemany(
+        WRITE, ((number, 'Текст поста ' * 10) for number in range(rows))
+    )
+    connection.commit()
+    connection.close()
+
+
+def connect(path, pragmas):
+    connection = sqlite3.connect(path, check_same_thread=False)
+    for name, value in pragmas.items():
+        connection.execute(f'PRAGMA {name} = {value}')
+    return connection
+
+
+def worker(path, pragmas, operation, deadline, results):
+    connection = connect(path, pragmas)
+    timings, errors = [], 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            if operation == 'read':
+                connection.execute(READ).fetchall()
+            else:
+                connection.execute(WRITE, (time.time(), 'Новый пост'))
+                connection.commit()
+        except sqlite3.OperationalError:
+            errors += 1
+            connection.rollback()
+            continue
+        timings.append(time.perf_counter() - start)
+    connection.close()
+    results.append((operation, timings, errors))
+
+
+def run(label, pragmas, options):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.sqlite3')
+        prepare(path, options.rows)
+        results = []
+        deadline = time.perf_counter() + options.duration
+        threads = [
+            threading.Thread(
+                target=worker,
+                args=(path, pragmas, operation, deadline, results),
+            )
+            for operation, total in (
+                ('read', options.readers), ('write', options.writers)
+            )
+            for _ in range(total)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    for operation in ('read', 'write'):
+        timings = [
+            timing for kind, chunk, _ in results if kind == operation
+            for timing in chunk
+        ]
+        errors = sum(count for kind, _, count in results if kind == operation)
+        if not timings:
+            print(f'{label:<8} {operation:<5} нет успешных операций, '
+                  f'ошибок {errors}')
+            continue
+        stats = summary(timings)
+        print(
+            f'{label:<8} {operation:<5} {len(timings) / options.duration:9.0f}'
+            f' оп/с  median {stats["median_ms"]:7.3f} ms  '
+            f'p95 {stats["p95_ms"]:7.3f} ms  ошибок {errors}'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--duration', type=float, default=5)
+    options = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+
+    run('default', {}, options)
+    run('tuned', settings.SQLITE_PRAGMAS, options)
+
+
+if __name__ == '__main__':
+    main()
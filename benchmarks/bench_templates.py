@@ -0,0 +1,137 @@
+"""
+Время рендера каждого шаблона ленты: загрузчики без кэша (как при
+DEBUG) против cached.Loader, который Django включает сам при
+DEBUG = False, а также {% url %} против {% cached_url %}.
+
+    python -m benchmarks.bench_templates --posts 1000 --repeat 500
+"""
+import argparse
+
+from benchmarks.bench_post_cards import seed
+from benchmarks.utils import measure, report, setup_django, test_database
+
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+HEADER_LINKS = (
+    'posts:index', 'about:author', 'about:tech', 'search:search',
+    'users:login', 'users:signup',
+)
+
+
+def make_engine(name, cached):
+    from django.conf import settings
+    from django.template.backends.django import DjangoTemplates
+
+    options = dict(settings.TEMPLATES[0]['OPTIONS'])
+    options['loaders'] = (
+        [('django.template.loaders.cached.Loader', LOADERS)]
+        if cached else LOADERS
+    )
+    return DjangoTemplates({
+        'NAME': name,
+        'DIRS': settings.TEMPLATES[0]['DIRS'],
+        'APP_DIRS': False,
+        'OPTIONS': options,
+    })
+
+
+def contexts():
+    """Контексты шаблонов, собранные так же, как во view."""
+    from django.core.paginator import Paginator
+
+    from posts.forms import CommentForm
+    from posts.models import Comment, Group, Post, User, author_posts_count
+    from posts.paginators import CachedCountPaginator
+
+    def page(queryset):
+        page_obj = CachedCountPaginator(queryset, 10).get_page(2)
+        list(page_obj)
+        return page_obj
+
+    group = Group.objects.first()
+    author = User.objects.select_related('post_counter').first()
+    post = Post.objects.select_related(
+        'group', 'author__post_counter'
+    ).first()
+    Comment.objects.bulk_create(
+        Comment(post=post, author=author, text=f'Комментарий {number}')
+        for number in range(20)
+    )
+    comments = Paginator(
+        Comment.objects.filter(post=post).select_related('author'), 20
+    ).get_page(1)
+    list(comments)
+    posts = Post.objects.select_related('group', 'author')
+    return {
+        'includes/header.html': {},
+        'includes/post_card.html': {'post': post},
+        'posts/includes/paginator.html': {'page_obj': page(posts)},
+        'posts/index.html': {'page_obj': page(posts)},
+        'posts/group_list.html': {
+            'group': group,
+            'page_obj': page(posts.filter(group=group)),
+        },
+        'posts/profile.html': {
+            'author': author,
+            'page_obj': page(posts.filter(author=author)),
+            'posts_count': author_posts_count(author),
+            'following': False,
+        },
+        'posts/post_detail.html': {
+            'post': post,
+            'is_archived': False,
+            'posts_count': author_posts_count(post.author),
+            'comments': comments,
+            'form': CommentForm(),
+        },
+    }
+
+
+def bench_urls(engine, request, repeat):
+    for tag in ('url', 'cached_url'):
+        source = '{% load cached_urls %}' + ''.join(
+            f'{{% {tag} "{name}" %}}' for name in HEADER_LINKS
+        )
+        template = engine.from_string(source)
+
+        def render():
+            template.render({}, request)
+
+        render()
+        report(f'{len(HEADER_LINKS)} x {{% {tag} %}}',
+               measure(render, repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=500)
+    options = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import AnonymousUser
+    from django.test import RequestFactory
+
+    engines = {
+        'uncached': make_engine('uncached', cached=False),
+        'cached': make_engine('cached', cached=True),
+    }
+    with test_database():
+        seed(options.posts)
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        for name, context in contexts().items():
+            for label, engine in engines.items():
+                def render():
+                    engine.get_template(name).render(context, request)
+
+                # Первый рендер прогревает кэш карточек и загрузчика.
+                render()
+                report(f'{name} {label}', measure(render, options.repeat))
+        bench_urls(engines['cached'], request, options.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Сравнивает два JSON-файла benchmarks.load по p50/p95/p99.
+
+    python -m benchmarks.compare before.json after.json
+"""
+import argparse
+import json
+
+
+def load(path):
+    with open(path, encoding='utf-8') as stream:
+        return json.load(stream)
+
+
+def change(before, after):
+    if not before:
+        return '     n/a'
+    return f'{(after - before) / before * 100:+7.1f}%'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('before')
+    parser.add_argument('after')
+    options = parser.parse_args()
+    before, after = load(options.before), load(options.after)
+    print(f'{before["commit"]} -> {after["commit"]}')
+    rows = [('total', before['total'], after['total'])] + [
+        (name, before['routes'][name], after['routes'][name])
+        for name in after['routes'] if name in before['routes']
+    ]
+    for name, old, new in rows:
+        print(f'{name:<24}' + ''.join(
+            f'  {metric} {new[metric]:8.2f} ms '
+            f'{change(old[metric], new[metric])}'
+            for metric in ('p50_ms', 'p95_ms', 'p99_ms')
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,329 @@
+"""
+Нагрузочный прогон всех маршрутов posts.urls, users.urls и about.urls
+через WSGI-приложение в несколько потоков. Маршруты под login_required
+идут от имени засеянного автора, формы записи отправляются POST.
+Печатает p50/p95/p99, пропускную способность и SQL-запросы на запрос,
+сохраняет JSON для сравнения прогонов (python -m benchmarks.compare).
+Маршруты записи идут только с файлом БД (--database): общая in-memory
+база под параллельными записями отвечает "database table is locked".
+Ответы 4xx/5xx в задержки не входят и печатаются отдельно.
+
+    python -m benchmarks.load --posts 1000000 --authors 10000 \
+        --groups 500 --database /tmp/bench.sqlite3 --requests 20
+"""
+import argparse
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+from benchmarks.seed import add_dataset_arguments, seed
+from benchmarks.utils import (BASE_DIR, configure, percentile, setup_django,
+                              test_database)
+
+URLCONFS = (
+    ('posts', 'posts.urls'),
+    ('users', 'users.urls'),
+    ('about', 'about.urls'),
+)
+SKIPPED = {'users:logout'}
+# Маршруты под login_required идут с сессией засеянного пользователя.
+AUTHENTICATED = {
+    'posts:post_create', 'posts:post_edit', 'posts:follow_index',
+    'posts:add_comment', 'posts:profile_follow', 'posts:profile_unfollow',
+}
+# Формы записи отправляются POST с данными, а не открываются GET.
+FORMS = {
+    'posts:post_create': {'text': 'Пост из нагрузочного прогона'},
+    'posts:post_edit': {'text': 'Пост, отредактированный нагрузкой'},
+    'posts:add_comment': {'text': 'Комментарий из нагрузочного прогона'},
+}
+# Маршруты записи без файла БД не прогоняются.
+WRITES = set(FORMS) | {'posts:profile_follow', 'posts:profile_unfollow'}
+
+
+def current_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+class Samples:
+    """Случайные значения для параметров маршрутов из наполненной базы."""
+    def __init__(self, rng, user):
+        from posts.models import Group, Post, User
+        self.rng = rng
+        self.values = {
+            'slug': list(Group.objects.values_list('slug', flat=True)[:1000]),
+            'username': list(
+                User.objects.exclude(pk=user.pk)
+                .values_list('username', flat=True)[:1000]
+            ),
+            'post_id': list(
+                Post.objects.order_by('-pub_date')
+                .values_list('pk', flat=True)[:1000]
+            ),
+            'fmt': ['rss', 'atom', 'json'],
+        }
+        # Редактировать можно только свои посты.
+        self.own_posts = list(
+            user.posts.order_by('-pub_date')
+            .values_list('pk', flat=True)[:1000]
+        )
+
+    def kwargs(self, name, params):
+        kwargs = {
+            param: self.rng.choice(self.values[param]) for param in params
+        }
+        if name == 'posts:post_edit':
+            kwargs['post_id'] = self.rng.choice(self.own_posts)
+        return kwargs
+
+
+def login(user):
+    """
+    Cookie сессии и CSRF-токен для запросов от имени user. Токен
+    берётся из cookie, которую ставит страница формы.
+    """
+    from django.conf import settings
+    from django.test import Client
+    from django.urls import reverse
+
+    client = Client()
+    client.force_login(user)
+    client.get(reverse('posts:post_create'))
+    session = client.cookies[settings.SESSION_COOKIE_NAME].value
+    token = client.cookies[settings.CSRF_COOKIE_NAME].value
+    cookie = (
+        f'{settings.SESSION_COOKIE_NAME}={session}; '
+        f'{settings.CSRF_COOKIE_NAME}={token}'
+    )
+    return cookie, token
+
+
+def routes(writes):
+    from importlib import import_module
+
+    from django.urls import URLPattern
+    for namespace, module in URLCONFS:
+        for pattern in import_module(module).urlpatterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name:
+                continue
+            name = f'{namespace}:{pattern.name}'
+            if name in SKIPPED or (name in WRITES and not writes):
+                continue
+            yield name, tuple(pattern.pattern.converters)
+
+
+def wsgi_request(app, path, data=None, credentials=None):
+    body = urlencode(data).encode() if data is not None else b''
+    environ = {
+        'REQUEST_METHOD': 'POST' if data is not None else 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+        'CONTENT_LENGTH': str(len(body)),
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'HTTP_HOST': 'testserver',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    if credentials is not None:
+        cookie, token = credentials
+        environ['HTTP_COOKIE'] = cookie
+        environ['HTTP_X_CSRFTOKEN'] = token
+    status = []
+    result = app(environ, lambda code, headers, exc_info=None: status.append(
+        code
+    ))
+    try:
+        for _ in result:
+            pass
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return int(status[0].split()[0])
+
+
+def run(app, plan, concurrency, credentials):
+    from core.metrics import record_queries
+
+    results = defaultdict(list)
+    lock = threading.Lock()
+
+    def hit(job):
+        name, path = job
+        with record_queries() as queries:
+            start = time.perf_counter()
+            status = wsgi_request(
+                app, path, FORMS.get(name),
+                credentials if name in AUTHENTICATED else None,
+            )
+            elapsed = time.perf_counter() - start
+        with lock:
+            results[name].append((elapsed, queries.count, status))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(hit, job) for job in plan]:
+            future.result()
+    return results, time.perf_counter() - start
+
+
+def succeeded(status):
+    return 200 <= status < 400
+
+
+def latencies(timings):
+    """p50/p95/p99 в мс; у маршрута без успешных ответов - nan."""
+    return {
+        f'p{percent}_ms': (
+            percentile(timings, percent) * 1000 if timings else float('nan')
+        )
+        for percent in (50, 95, 99)
+    }
+
+
+def summarize(results, wall):
+    report = {}
+    for name, samples in sorted(results.items()):
+        timings = [
+            elapsed for elapsed, queries, status in samples
+            if succeeded(status)
+        ]
+        report[name] = {
+            'requests': len(samples),
+            'errors': len(samples) - len(timings),
+            **latencies(timings),
+            'queries_per_request': sum(
+                queries for elapsed, queries, status in samples
+            ) / len(samples),
+            'statuses': dict(Counter(
+                str(status) for elapsed, queries, status in samples
+            )),
+        }
+    samples = [sample for samples in results.values() for sample in samples]
+    timings = [
+        elapsed for elapsed, queries, status in samples if succeeded(status)
+    ]
+    total = {
+        'requests': len(samples),
+        'errors': len(samples) - len(timings),
+        'wall_s': wall,
+        'throughput_rps': len(samples) / wall if wall else 0,
+        **latencies(timings),
+    }
+    return report, total
+
+
+def print_report(report, total):
+    print(
+        f'{"route":<24}{"req":>6}{"err":>5}'
+        f'{"p50":>9}{"p95":>9}{"p99":>9}{"sql":>7}'
+    )
+    for name, row in report.items():
+        print(
+            f'{name:<24}{row["requests"]:>6}{row["errors"]:>5}'
+            f'{row["p50_ms"]:>9.2f}{row["p95_ms"]:>9.2f}{row["p99_ms"]:>9.2f}'
+            f'{row["queries_per_request"]:>7.1f}'
+        )
+    print(
+        f'Всего {total["requests"]} запросов за {total["wall_s"]:.2f} с, '
+        f'{total["throughput_rps"]:.1f} req/s, p99 {total["p99_ms"]:.2f} ms, '
+        f'ошибок {total["errors"]}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_dataset_arguments(parser)
+    parser.add_argument(
+        '--requests', type=int, default=50, help='Запросов на маршрут.'
+    )
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument(
+        '--no-cache', action='store_true',
+        help='DummyCache вместо настроенного кэша.',
+    )
+    parser.add_argument(
+        '--output',
+        help='Куда сохранить JSON; по умолчанию benchmarks/results/.',
+    )
+    options = parser.parse_args()
+
+    configure(database=options.database, dummy_cache=options.no_cache)
+    setup_django()
+    from django.core.management import call_command
+    from django.core.wsgi import get_wsgi_application
+    from django.urls import reverse
+
+    from posts.models import Post, User
+
+    database = nullcontext() if options.database else test_database()
+    with database:
+        if options.database:
+            call_command('migrate', verbosity=0)
+        if not Post.objects.exists():
+            seed(
+                options.posts, options.authors, options.groups,
+                seed_value=options.seed, stdout=sys.stdout,
+            )
+        rng = random.Random(options.seed)
+        user = User.objects.filter(posts__isnull=False).first()
+        samples = Samples(rng, user)
+        plan = [
+            (name, reverse(name, kwargs=samples.kwargs(name, params)))
+            for name, params in routes(writes=bool(options.database))
+            for _ in range(options.requests)
+        ]
+        rng.shuffle(plan)
+        app = get_wsgi_application()
+        results, wall = run(app, plan, options.concurrency, login(user))
+        report, total = summarize(results, wall)
+        dataset = {
+            'posts': Post.objects.count(),
+            'authors': options.authors,
+            'groups': options.groups,
+        }
+
+    print_report(report, total)
+    commit = current_commit()
+    output = options.output or os.path.join(
+        BASE_DIR, 'benchmarks', 'results',
+        f'{commit}-{datetime.now():%Y%m%d-%H%M%S}.json',
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as stream:
+        json.dump({
+            'commit': commit,
+            'created': datetime.now(timezone.utc).isoformat(),
+            'dataset': dataset,
+            'concurrency': options.concurrency,
+            'cache': not options.no_cache,
+            'total': total,
+            'routes': report,
+        }, stream, ensure_ascii=False, indent=2)
+    print(f'Результаты: {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Наполняет базу синтетическими данными через Faker и Importer
+из команды bulk_import (счётчики и pub_date учитываются).
+
+    python -m benchmarks.seed --database /tmp/bench.sqlite3 \
+        --posts 1000000 --authors 10000 --groups 500
+"""
+import argparse
+import random
+import time
+from datetime import timedelta
+
+from benchmarks.utils import configure, setup_django
+
+
+def seed(posts, authors, groups, chunk_size=5000, seed_value=0, stdout=None):
+    from django.utils import timezone
+    from faker import Faker
+
+    from posts.management.commands.bulk_import import Importer
+
+    faker = Faker('ru_RU')
+    Faker.seed(seed_value)
+    rng = random.Random(seed_value)
+    importer = Importer()
+    start = time.perf_counter()
+
+    def flush_if_full():
+        if len(importer) >= chunk_size:
+            importer.flush()
+
+    usernames = [f'bench{number}' for number in range(authors)]
+    for username in usernames:
+        importer.add('user', {
+            'username': username,
+            'first_name': faker.first_name(),
+            'last_name': faker.last_name(),
+        })
+        flush_if_full()
+    slugs = [f'bench-group-{number}' for number in range(groups)]
+    for slug in slugs:
+        importer.add('group', {
+            'slug': slug,
+            'title': faker.sentence(nb_words=3)[:200],
+            'description': faker.paragraph(),
+        })
+        flush_if_full()
+    now = timezone.now()
+    for number in range(posts):
+        pub_date = now - timedelta(seconds=(posts - number) * 60)
+        importer.add('post', {
+            'author': rng.choice(usernames),
+            'group': rng.choice(slugs) if slugs and rng.random() < 0.7
+            else None,
+            'text': faker.paragraph(nb_sentences=4),
+            'pub_date': pub_date.isoformat(),
+        })
+        flush_if_full()
+        if stdout is not None and number and number % 100000 == 0:
+            stdout.write(f'  постов: {number}\n')
+    importer.flush()
+    return time.perf_counter() - start
+
+
+def add_dataset_arguments(parser):
+    parser.add_argument('--posts', type=int, default=10000)
+    parser.add_argument('--authors', type=int, default=100)
+    parser.add_argument('--groups', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--database',
+        help='Файл SQLite для набора данных; по умолчанию временная БД.',
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_dataset_arguments(parser)
+    options = parser.parse_args()
+    if not options.database:
+        parser.error('для отдельного наполнения нужен --database')
+    configure(database=options.database)
+    setup_django()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    elapsed = seed(
+        options.posts, options.authors, options.groups,
+        seed_value=options.seed,
+    )
+    print(f'Наполнено за {elapsed:.1f} с')
+
+
+if __name__ == '__main__':
+    main()
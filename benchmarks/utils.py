@@ -0,0 +1,80 @@
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.join(BASE_DIR, 'yatube')
+
+
+def configure(database=None, dummy_cache=False):
+    """Правит настройки до django.setup(): файл БД и отключение кэша."""
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    from django.conf import settings
+    # Процессы пула задач подняли бы настройки заново и не увидели бы
+    # ни тестовую БД, ни --database: задачи выполняются на месте.
+    settings.TASKS_EAGER = True
+    if database:
+        settings.DATABASES['default']['NAME'] = database
+    if dummy_cache:
+        settings.CACHES = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+            }
+        }
+
+
+def setup_django():
+    configure()
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database(verbosity=0):
+    """Временная БД с миграциями, чтобы не трогать db.sqlite3."""
+    from django.db import connection
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=verbosity)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+
+
+def measure(func, repeat, before=None):
+    timings = []
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def percentile(timings, percent):
+    ordered = sorted(timings)
+    index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+    return ordered[index]
+
+
+def summary(timings):
+    return {
+        'runs': len(timings),
+        'median_ms': statistics.median(timings) * 1000,
+        'min_ms': min(timings) * 1000,
+        'p95_ms': percentile(timings, 95) * 1000,
+    }
+
+
+def report(label, timings):
+    stats = summary(timings)
+    print(
+        f'{label:<32} median {stats["median_ms"]:8.3f} ms  '
+        f'min {stats["min_ms"]:8.3f} ms  p95 {stats["p95_ms"]:8.3f} ms  '
+        f'({stats["runs"]} runs)'
+    )
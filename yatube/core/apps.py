@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.core.signals import request_finished
+from django.db.backends.signals import connection_created
+from django.test.signals import setting_changed
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from .sqlite import apply_pragmas, optimize_periodically
+        from .templatetags.cached_urls import clear_url_memo
+        connection_created.connect(apply_pragmas)
+        request_finished.connect(optimize_periodically)
+        setting_changed.connect(clear_url_memo)
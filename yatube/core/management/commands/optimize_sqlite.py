@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.sqlite import optimize
+
+
+class Command(BaseCommand):
+    help = (
+        'Обновляет статистику планировщика SQLite (PRAGMA optimize, '
+        'при --analyze полный ANALYZE) и сбрасывает WAL. Запускать '
+        'по cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true')
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        optimize(connection, analyze=options['analyze'])
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        self.stdout.write('Готово.')
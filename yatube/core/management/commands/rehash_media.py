@@ -0,0 +1,107 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.storage import ContentAddressedStorage, acquire, is_hashed
+
+
+def hashed_fields():
+    for model in apps.get_models():
+        for field in model._meta.fields:
+            if isinstance(field, models.FileField) and isinstance(
+                field.storage, ContentAddressedStorage
+            ):
+                yield model, field
+
+
+def stale_fields(model):
+    """
+    Поля строки, описывающие файл по старому пути: миниатюры строятся
+    от имени файла, поэтому их набор сбрасывается (его заново построит
+    warm_thumbnails), а версия карточки и updated_at меняются.
+    """
+    names = {field.name for field in model._meta.fields}
+    updates = {}
+    if 'thumbnail_widths' in names:
+        updates['thumbnail_widths'] = ''
+    if 'version' in names:
+        updates['version'] = F('version') + 1
+    if 'updated_at' in names:
+        updates['updated_at'] = timezone.now()
+    return updates
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит файлы полей с ContentAddressedStorage из старых '
+        'плоских путей в шардированные по хешу и переписывает пути '
+        'в базе пачками. Повторный запуск продолжает с места остановки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        fields = list(hashed_fields())
+        moved = missing = 0
+        for model, field in fields:
+            last_pk = None
+            while True:
+                rows = model.objects.exclude(**{field.name: ''}).order_by('pk')
+                if last_pk is not None:
+                    rows = rows.filter(pk__gt=last_pk)
+                rows = list(
+                    rows.values_list('pk', field.attname)
+                    [:options['batch_size']]
+                )
+                if not rows:
+                    break
+                last_pk = rows[-1][0]
+                batch_moved, batch_missing, old_names = self.rehash(
+                    model, field, rows
+                )
+                moved += batch_moved
+                missing += batch_missing
+                self.delete_unreferenced(fields, field.storage, old_names)
+                self.stdout.write(
+                    f'{model._meta.label}.{field.name}: '
+                    f'перенесено {moved}, нет файла {missing}'
+                )
+        self.stdout.write(f'Готово: перенесено {moved}, нет файла {missing}')
+        if moved:
+            self.stdout.write(
+                'Миниатюры перенесённых картинок строит warm_thumbnails.'
+            )
+
+    @transaction.atomic
+    def rehash(self, model, field, rows):
+        storage = field.storage
+        moved = missing = 0
+        old_names = set()
+        for pk, name in rows:
+            if is_hashed(name):
+                continue
+            if not storage.exists(name):
+                missing += 1
+                continue
+            with storage.open(name) as content:
+                new_name = storage.save(name, content)
+            model.objects.filter(pk=pk).update(
+                **{field.attname: new_name}, **stale_fields(model)
+            )
+            acquire(new_name)
+            old_names.add(name)
+            moved += 1
+        return moved, missing, old_names
+
+    @staticmethod
+    def delete_unreferenced(fields, storage, old_names):
+        for model, field in fields:
+            old_names -= set(
+                model.objects.filter(**{f'{field.attname}__in': old_names})
+                .values_list(field.attname, flat=True)
+            )
+        for name in old_names:
+            storage.delete(name)
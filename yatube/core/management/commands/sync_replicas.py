@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.replication import copy_database
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную SQLite-базу в реплики из DATABASE_REPLICAS '
+        '(замена настоящей репликации для локального стенда).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'aliases', nargs='*',
+            help='Алиасы реплик; по умолчанию все из DATABASE_REPLICAS.',
+        )
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or settings.DATABASE_REPLICAS
+        if not aliases:
+            raise CommandError('Не задано ни одной реплики.')
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('Копирование поддерживается только для SQLite.')
+        for alias in aliases:
+            connections[alias].close()
+            copy_database('default', settings.DATABASES[alias]['NAME'])
+            self.stdout.write(f'{alias}: скопировано')
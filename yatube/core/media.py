@@ -0,0 +1,157 @@
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (FileResponse, Http404, HttpResponse,
+                         StreamingHttpResponse)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+from .storage import HASHED_NAME
+
+HASH_DIRECTORY = re.compile(r'(^|/)[0-9a-f]{64}/')
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def is_immutable(path):
+    """Имя из хеша содержимого (или миниатюра такого файла) не меняется."""
+    return bool(HASHED_NAME.search(path) or HASH_DIRECTORY.search(path))
+
+
+def cache_control(path):
+    if is_immutable(path):
+        return IMMUTABLE
+    return f'public, max-age={settings.MEDIA_CACHE_SECONDS}'
+
+
+def accel_response(path, full_path):
+    """Отдачу файла забирает фронтовый сервер, Django только проверил путь."""
+    response = HttpResponse()
+    if settings.MEDIA_ACCEL == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = quote(
+            settings.MEDIA_ACCEL_PREFIX + path
+        )
+    else:
+        response['X-Sendfile'] = full_path
+    # Тип ответа nginx и mod_xsendfile определяют по файлу сами.
+    del response['Content-Type']
+    return response
+
+
+def parse_range(header, size):
+    """
+    Возвращает (start, end) включительно, None для отсутствующего или
+    неподдерживаемого заголовка и False для невыполнимого диапазона.
+    Несколько диапазонов сразу не поддерживаются: отдаётся весь файл.
+    """
+    match = RANGE.match(header.replace(' ', '')) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def read_range(file, start, length):
+    with file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def if_range_matches(request, etag, last_modified):
+    value = request.META.get('HTTP_IF_RANGE')
+    if not value:
+        return True
+    if value.startswith(('"', 'W/')):
+        return value == etag
+    return parse_http_date_safe(value) == last_modified
+
+
+def find_file(path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stats = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404
+    if not stat.S_ISREG(stats.st_mode):
+        raise Http404
+    return full_path, stats
+
+
+def file_response(request, full_path, size, etag, last_modified):
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+    byte_range = None
+    if if_range_matches(request, etag, last_modified):
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range is None:
+        response = FileResponse(
+            open(full_path, 'rb'), content_type=content_type
+        )
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            read_range(open(full_path, 'rb'), start, length),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Отдаёт файл из MEDIA_ROOT. С MEDIA_ACCEL передаёт отдачу nginx
+    (X-Accel-Redirect) или Apache/lighttpd (X-Sendfile); без него
+    стримит сам, с Range, ETag и If-Modified-Since.
+    """
+    full_path, stats = find_file(path)
+    if settings.MEDIA_ACCEL:
+        response = accel_response(path, full_path)
+        response['Cache-Control'] = cache_control(path)
+        return response
+
+    last_modified = int(stats.st_mtime)
+    etag = f'"{stats.st_mtime_ns:x}-{stats.st_size:x}"'
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        response = file_response(
+            request, full_path, stats.st_size, etag, last_modified
+        )
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = cache_control(path)
+    return response
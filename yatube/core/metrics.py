@@ -0,0 +1,149 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+MS_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+
+def query_budget(limit):
+    """Объявляет, сколько SQL-запросов допустимо view на один запрос."""
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += 1
+        self.sum += value
+
+    def snapshot(self):
+        bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+        return {
+            'count': self.total,
+            'sum': round(self.sum, 3),
+            'buckets': dict(zip(bounds, self.counts)),
+        }
+
+
+class MetricsRegistry:
+    metrics = {
+        'queries': QUERY_BUCKETS,
+        'db_ms': MS_BUCKETS,
+        'template_ms': MS_BUCKETS,
+        'wall_ms': MS_BUCKETS,
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view_name, **values):
+        with self._lock:
+            histograms = self._views.get(view_name)
+            if histograms is None:
+                histograms = self._views[view_name] = {
+                    name: Histogram(buckets)
+                    for name, buckets in self.metrics.items()
+                }
+            for name, value in values.items():
+                histograms[name].observe(value)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                view_name: {
+                    name: histogram.snapshot()
+                    for name, histogram in histograms.items()
+                }
+                for view_name, histograms in sorted(self._views.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+registry = MetricsRegistry()
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+@contextmanager
+def record_queries():
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+
+_template_timer = threading.local()
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timer = getattr(_template_timer, 'timer', None)
+        if timer is None:
+            return super().render(context, request)
+        # Вложенные рендеры уже входят в замер внешнего.
+        _template_timer.timer = None
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timer.seconds += time.perf_counter() - start
+            _template_timer.timer = timer
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    Бэкенд DjangoTemplates, шаблоны которого замеряют своё время
+    внутри record_templates. {% include %} и {% extends %} идут через
+    движок и попадают в замер шаблона, который их вызвал.
+    """
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+class TemplateTimer:
+    seconds = 0.0
+
+
+@contextmanager
+def record_templates():
+    timer = TemplateTimer()
+    _template_timer.timer = timer
+    try:
+        yield timer
+    finally:
+        _template_timer.timer = None
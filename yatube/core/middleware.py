@@ -0,0 +1,163 @@
+import math
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+
+from . import routers
+from .admission import ConcurrencyLimit, TokenBuckets
+from .metrics import record_queries, record_templates, registry
+
+PIN_COOKIE = 'pin_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RequestMetricsMiddleware:
+    """
+    Считает SQL-запросы, время БД, шаблонов и общее время ответа
+    для каждого URL name и складывает их в гистограммы registry.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with record_queries() as queries, record_templates() as templates:
+            response = self.get_response(request)
+        wall = time.perf_counter() - start
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            registry.record(
+                match.view_name,
+                queries=queries.count,
+                db_ms=queries.seconds * 1000,
+                template_ms=templates.seconds * 1000,
+                wall_ms=wall * 1000,
+            )
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """
+    Пользователь, который только что что-то записал, ещё
+    REPLICA_PIN_SECONDS читает с default: реплика могла не успеть
+    получить его запись.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        routers.reset_pinning(pinned=PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+            wrote = routers.has_written()
+        finally:
+            routers.reset_pinning()
+        if wrote:
+            response.set_cookie(
+                PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+class AdmissionControlMiddleware:
+    """
+    Ограничивает частоту запросов корзинами токенов по IP и по
+    пользователю и число одновременных запросов отдельно для чтения
+    и записи (небезопасные методы и ADMISSION_WRITE_VIEWS), чтобы поток
+    POST на формы не занимал блокировку записи SQLite в ущерб лентам.
+    Сверх частоты отвечает 429, сверх параллельности - 503, оба
+    с Retry-After. Слот потокового ответа занят, пока тело не отдано.
+    Счётчики живут в памяти процесса.
+    """
+    def __init__(self, get_response):
+        if not settings.ADMISSION_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.buckets = TokenBuckets(settings.ADMISSION_MAX_KEYS)
+        self.slots = {
+            kind: ConcurrencyLimit(limits['concurrency'])
+            for kind, limits in settings.ADMISSION_LIMITS.items()
+        }
+
+    def __call__(self, request):
+        kind = self.classify(request)
+        wait = self.throttle(request, kind)
+        if wait:
+            return self.reject(429, wait)
+        slots = self.slots[kind]
+        if not slots.acquire():
+            return self.reject(503, settings.ADMISSION_RETRY_AFTER)
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            slots.release()
+            raise
+        if response.streaming:
+            self.release_on_close(response, slots)
+        else:
+            slots.release()
+        return response
+
+    @staticmethod
+    def classify(request):
+        if request.method not in SAFE_METHODS:
+            return 'write'
+        # URL ещё не разобран: resolver_match появится только во view.
+        try:
+            match = resolve(
+                request.path_info, getattr(request, 'urlconf', None)
+            )
+        except Resolver404:
+            return 'read'
+        if match.view_name in settings.ADMISSION_WRITE_VIEWS:
+            return 'write'
+        return 'read'
+
+    @staticmethod
+    def release_on_close(response, slots):
+        """Слот освобождается, когда сервер закрывает ответ."""
+        close = response.close
+        released = []
+
+        def close_and_release():
+            try:
+                close()
+            finally:
+                if not released:
+                    released.append(True)
+                    slots.release()
+
+        response.close = close_and_release
+
+    def throttle(self, request, kind):
+        limits = settings.ADMISSION_LIMITS[kind]
+        clients = {'ip': request.META.get(settings.ADMISSION_IP_HEADER)}
+        user = getattr(request, 'user', None)
+        if 'user' in limits and user is not None and user.is_authenticated:
+            clients['user'] = user.pk
+        wait = 0
+        for scope, client in clients.items():
+            if scope in limits:
+                wait = max(wait, self.buckets.take(
+                    f'{kind}:{scope}:{client}', *limits[scope]
+                ))
+        return wait
+
+    @staticmethod
+    def reject(status, wait):
+        response = HttpResponse(
+            'Слишком много запросов, повторите позже.',
+            status=status,
+            content_type='text/plain; charset=utf-8',
+        )
+        response['Retry-After'] = str(max(1, math.ceil(wait)))
+        return response
@@ -0,0 +1,17 @@
+import sqlite3
+
+from django.db import connections
+
+
+def copy_database(source_alias, target_path):
+    """
+    Копирует SQLite-базу source_alias в файл target_path через
+    backup API: копия согласованная даже при идущей записи.
+    """
+    source = connections[source_alias]
+    source.ensure_connection()
+    target = sqlite3.connect(target_path)
+    try:
+        source.connection.backup(target)
+    finally:
+        target.close()
@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends import cached_db
+
+REFRESHED_KEY = '_refreshed_at'
+
+
+class SessionStore(cached_db.SessionStore):
+    """
+    cached_db: сессия читается из кэша, пишется сквозь кэш в БД и
+    поднимается из БД, если кэш её потерял. Сверх этого при
+    SESSION_SAVE_EVERY_REQUEST неизменённая сессия пишется не чаще раза
+    в SESSION_REFRESH_INTERVAL секунд: продление срока жизни сливается
+    в одну запись, а серверный срок отстаёт от куки не больше чем
+    на этот интервал.
+    """
+
+    def is_fresh(self):
+        refreshed = self._session.get(REFRESHED_KEY)
+        return (
+            refreshed is not None
+            and time.time() - refreshed < settings.SESSION_REFRESH_INTERVAL
+        )
+
+    def save(self, must_create=False):
+        if (
+            not must_create and not self.modified
+            and self.session_key is not None and self.is_fresh()
+        ):
+            return
+        # Метка пишется мимо __setitem__, чтобы не помечать сессию
+        # изменённой.
+        self._session[REFRESHED_KEY] = int(time.time())
+        super().save(must_create)
@@ -0,0 +1,66 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+_lock = threading.Lock()
+_last_optimize = time.monotonic()
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """Настраивает каждое новое SQLite-соединение по SQLITE_PRAGMAS."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def optimize(connection, analyze=False):
+    with connection.cursor() as cursor:
+        if analyze:
+            cursor.execute('ANALYZE')
+        cursor.execute('PRAGMA analysis_limit = 1000')
+        cursor.execute('PRAGMA optimize')
+
+
+def optimize_periodically(sender, **kwargs):
+    """
+    Раз в SQLITE_OPTIMIZE_INTERVAL секунд после ответа запускает
+    PRAGMA optimize на уже открытых постоянных соединениях.
+    """
+    global _last_optimize
+    now = time.monotonic()
+    if now - _last_optimize < settings.SQLITE_OPTIMIZE_INTERVAL:
+        return
+    if not _lock.acquire(blocking=False):
+        return
+    try:
+        _last_optimize = now
+        for connection in connections.all():
+            if connection.vendor == 'sqlite' and connection.connection:
+                optimize(connection)
+    finally:
+        _lock.release()
+
+
+def estimated_rows(model, using='default'):
+    """
+    Число строк таблицы модели по статистике ANALYZE из sqlite_stat1
+    без COUNT(*). None, если статистики ещё нет.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 '
+                'WHERE tbl = %s',
+                [model._meta.db_table],
+            )
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    return row[0]
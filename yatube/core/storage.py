@@ -0,0 +1,95 @@
+import hashlib
+import os
+import posixpath
+import re
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+
+from .models import StoredFile
+
+HASHED_NAME = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.\w+$')
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def is_hashed(name):
+    return bool(HASHED_NAME.search(name))
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Хранит файл под именем из sha256 содержимого в каталогах
+    <upload_to>/ab/cd/<hash>.<ext>: одинаковые картинки лежат на диске
+    один раз, а в одном каталоге не скапливаются сотни тысяч файлов.
+    Удаляются файлы через release(), когда пропадает последняя ссылка.
+    """
+    def _save(self, name, content):
+        directory, filename = posixpath.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        digest = content_hash(content)
+        name = posixpath.join(
+            directory, digest[:2], digest[2:4], digest + extension
+        )
+        if self.exists(name):
+            return name
+        # Тот же файл может параллельно писать другой запрос: пишем во
+        # временный файл и ставим его на место атомарно, иначе
+        # FileSystemStorage дал бы хешу суффикс _XXXXXXX.
+        temporary = super()._save(name + '.part', content)
+        os.replace(self.path(temporary), self.path(name))
+        return name
+
+
+def acquire(name):
+    """Учитывает ещё одну ссылку модели на файл."""
+    if not is_hashed(name):
+        return
+    updated = StoredFile.objects.filter(name=name).update(
+        refs=F('refs') + 1
+    )
+    if not updated:
+        stored, created = StoredFile.objects.get_or_create(
+            name=name, defaults={'refs': 1}
+        )
+        if not created:
+            StoredFile.objects.filter(name=name).update(refs=F('refs') + 1)
+
+
+def delete_unreferenced(name, storage, cleanup=None):
+    """
+    Удаляет файл, если на него так и не появилось ссылок: между
+    release и коммитом тот же файл мог загрузить другой запрос.
+    """
+    if StoredFile.objects.filter(name=name).exists():
+        return
+    storage.delete(name)
+    if cleanup is not None:
+        cleanup(name)
+
+
+def release(name, storage, cleanup=None):
+    """
+    Снимает ссылку; файл без ссылок удаляется после коммита вместе
+    с производными, которые убирает cleanup(name).
+    """
+    if not is_hashed(name):
+        return
+    StoredFile.objects.filter(name=name, refs__gt=0).update(
+        refs=F('refs') - 1
+    )
+    deleted, _ = StoredFile.objects.filter(name=name, refs=0).delete()
+    if deleted:
+        transaction.on_commit(
+            lambda: delete_unreferenced(name, storage, cleanup)
+        )
@@ -0,0 +1,77 @@
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_process_pool = None
+
+
+def setup_worker():
+    import django
+    django.setup()
+
+
+def process_pool():
+    global _process_pool
+    with _lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=settings.TASK_PROCESS_WORKERS,
+                mp_context=get_context('spawn'),
+                initializer=setup_worker,
+            )
+        return _process_pool
+
+
+def discard_pool(pool):
+    """Выбрасывает сломанный пул: следующий вызов поднимет новый."""
+    global _process_pool
+    with _lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False)
+
+
+def submit(func, *args):
+    """
+    Отправляет задачу в пул. Пул ломается, если рабочий процесс
+    умер; тогда он пересоздаётся и задача отправляется ещё раз, а при
+    повторной неудаче теряется с записью в лог: запись в базу, после
+    которой запускается задача, уже закоммичена и не должна падать.
+    """
+    for attempt in range(2):
+        pool = process_pool()
+        try:
+            future = pool.submit(func, *args)
+        except BrokenProcessPool:
+            discard_pool(pool)
+            continue
+        future.add_done_callback(_log_failure)
+        return future
+    logger.error('Пул процессов сломан, задача %s потеряна', func.__name__)
+    return None
+
+
+def _log_failure(future):
+    error = future.exception()
+    if error is not None:
+        logger.error('Фоновая задача упала', exc_info=error)
+
+
+def run_in_process(func, *args):
+    """
+    Выполняет func(*args) в пуле процессов после коммита транзакции.
+    func должна импортироваться по имени модуля. При TASKS_EAGER
+    вызывается сразу, в текущем процессе.
+    """
+    if settings.TASKS_EAGER:
+        return func(*args)
+    transaction.on_commit(lambda: submit(func, *args))
+    return None
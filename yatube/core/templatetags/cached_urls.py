@@ -0,0 +1,28 @@
+from functools import lru_cache
+
+from django import template
+from django.urls import get_script_prefix, get_urlconf, reverse
+
+register = template.Library()
+
+
+@lru_cache(maxsize=1024)
+def memo_reverse(urlconf, prefix, viewname, args):
+    # prefix входит в ключ: reverse() подставляет SCRIPT_NAME запроса.
+    return reverse(viewname, urlconf=urlconf, args=args)
+
+
+def clear_url_memo(setting, **kwargs):
+    if setting == 'ROOT_URLCONF':
+        memo_reverse.cache_clear()
+
+
+@register.simple_tag
+def cached_url(viewname, *args):
+    """
+    {% url %} с запоминанием результата. Для ссылок шапки и других
+    адресов, которые не меняются между запросами.
+    """
+    return memo_reverse(
+        get_urlconf(), get_script_prefix(), viewname, tuple(map(str, args))
+    )
@@ -0,0 +1,27 @@
+from urllib.parse import urlsplit
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+
+class QueryBudgetMixin:
+    """
+    Проверка для TestCase: view не выходит за объявленный
+    через core.metrics.query_budget лимит SQL-запросов.
+    """
+    def assertWithinQueryBudget(self, client, url, method='get', **kwargs):
+        match = resolve(urlsplit(url).path)
+        budget = getattr(match.func, 'query_budget', None)
+        if budget is None:
+            self.fail(f'{match.view_name}: не объявлен query_budget')
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(client, method)(url, **kwargs)
+        executed = len(queries)
+        if executed > budget:
+            sql = '\n'.join(query['sql'] for query in queries.captured_queries)
+            self.fail(
+                f'{match.view_name}: {executed} SQL-запросов '
+                f'при бюджете {budget}:\n{sql}'
+            )
+        return response
@@ -0,0 +1,89 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import reverse
+
+from core.admission import TokenBuckets
+from core.middleware import AdmissionControlMiddleware
+
+LIMITS = {
+    'read': {'ip': (100, 100), 'concurrency': 2},
+    'write': {'ip': (0.5, 2), 'concurrency': 1},
+}
+
+
+@override_settings(ADMISSION_ENABLED=True, ADMISSION_LIMITS=LIMITS)
+class AdmissionControlTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def request(self, method='post', address='10.0.0.1', path='/'):
+        request = getattr(self.factory, method)(path, REMOTE_ADDR=address)
+        request.user = AnonymousUser()
+        return request
+
+    def test_bucket_refills_with_time(self):
+        """Корзина отдаёт burst токенов и пополняется со скоростью rate."""
+        buckets = TokenBuckets(max_keys=10)
+        self.assertEqual(buckets.take('ip', 1, 2, now=0), 0)
+        self.assertEqual(buckets.take('ip', 1, 2, now=0), 0)
+        self.assertEqual(buckets.take('ip', 1, 2, now=0), 1)
+        self.assertEqual(buckets.take('ip', 1, 2, now=1), 0)
+
+    def test_writes_over_rate_get_429(self):
+        """Запись сверх корзины IP получает 429, чтение и другой IP - нет."""
+        middleware = AdmissionControlMiddleware(lambda request: HttpResponse())
+        for _ in range(2):
+            self.assertEqual(middleware(self.request()).status_code, 200)
+        response = middleware(self.request())
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '2')
+        self.assertEqual(middleware(self.request('get')).status_code, 200)
+        self.assertEqual(
+            middleware(self.request(address='10.0.0.2')).status_code, 200
+        )
+
+    def test_concurrent_writes_over_limit_get_503(self):
+        """Запись сверх лимита параллельности сразу получает 503."""
+        def view(request):
+            if request.method == 'GET':
+                return HttpResponse()
+            inner = middleware(self.request(address='10.0.0.3'))
+            reader = middleware(self.request('get'))
+            return HttpResponse(f'{inner.status_code} {reader.status_code}')
+
+        middleware = AdmissionControlMiddleware(view)
+        response = middleware(self.request())
+        self.assertEqual(response.content, b'503 200')
+        self.assertEqual(middleware(self.request()).status_code, 200)
+
+    def test_follow_by_get_counts_as_write(self):
+        """Подписка по GET расходует корзину записи, а не чтения."""
+        middleware = AdmissionControlMiddleware(lambda request: HttpResponse())
+        path = reverse('posts:profile_follow', args=['author'])
+        for _ in range(2):
+            self.assertEqual(
+                middleware(self.request('get', path=path)).status_code, 200
+            )
+        response = middleware(self.request('get', path=path))
+        self.assertEqual(response.status_code, 429)
+
+    def test_streaming_response_holds_slot_until_closed(self):
+        """Слот потокового ответа освобождается только после close()."""
+        middleware = AdmissionControlMiddleware(
+            lambda request: StreamingHttpResponse(iter([b'feed']))
+        )
+        first = middleware(self.request('get'))
+        second = middleware(self.request('get'))
+        self.assertEqual(middleware(self.request('get')).status_code, 503)
+        first.close()
+        first.close()
+        self.assertTrue(middleware(self.request('get')).streaming)
+        second.close()
+
+    @override_settings(ADMISSION_ENABLED=False)
+    def test_can_be_disabled(self):
+        """При ADMISSION_ENABLED = False middleware не подключается."""
+        with self.assertRaises(MiddlewareNotUsed):
+            AdmissionControlMiddleware(lambda request: HttpResponse())
@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+
+HASHED = 'posts/ab/cd/' + 'abcd' * 16 + '.jpg'
+
+
+class ServeMediaTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        for name in ('posts/plain.txt', HASHED):
+            path = os.path.join(cls.media_root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(b'0123456789')
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def get(self, path, **headers):
+        return self.client.get(f'/media/{path}', **headers)
+
+    def test_full_file_is_streamed(self):
+        """Файл отдаётся потоком с валидаторами и Accept-Ranges."""
+        response = self.get('posts/plain.txt')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+        self.assertIn('ETag', response)
+
+    def test_byte_ranges(self):
+        """Range отдаёт 206 с нужным куском или 416 за пределами файла."""
+        cases = (
+            ('bytes=2-5', b'2345', 'bytes 2-5/10'),
+            ('bytes=7-', b'789', 'bytes 7-9/10'),
+            ('bytes=-3', b'789', 'bytes 7-9/10'),
+        )
+        for header, content, content_range in cases:
+            with self.subTest(range=header):
+                response = self.get('posts/plain.txt', HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(b''.join(response.streaming_content), content)
+                self.assertEqual(response['Content-Range'], content_range)
+        response = self.get('posts/plain.txt', HTTP_RANGE='bytes=20-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_conditional_requests(self):
+        """If-None-Match даёт 304, устаревший If-Range - весь файл."""
+        etag = self.get('posts/plain.txt')['ETag']
+        response = self.get('posts/plain.txt', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.get(
+            'posts/plain.txt', HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"old"'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_hashed_names_are_immutable(self):
+        """Файлы с именем из хеша кэшируются навсегда."""
+        response = self.get(HASHED)
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_missing_and_outside_files(self):
+        """Несуществующие файлы и пути за MEDIA_ROOT дают 404."""
+        for path in ('posts/missing.txt', '../secret', 'posts'):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path).status_code, 404)
+
+    def test_front_server_handoff(self):
+        """С MEDIA_ACCEL отдачу забирает nginx или mod_xsendfile."""
+        with self.settings(MEDIA_ACCEL='x-accel-redirect'):
+            response = self.get('posts/plain.txt')
+            self.assertEqual(
+                response['X-Accel-Redirect'], '/internal-media/posts/plain.txt'
+            )
+            self.assertEqual(response.content, b'')
+        with self.settings(MEDIA_ACCEL='x-sendfile'):
+            response = self.get('posts/plain.txt')
+            self.assertEqual(
+                response['X-Sendfile'],
+                os.path.join(self.media_root, 'posts', 'plain.txt'),
+            )
@@ -0,0 +1,19 @@
+from django.template import engines
+from django.test import SimpleTestCase
+
+from core.metrics import TimedDjangoTemplates, record_templates
+
+
+class RecordTemplatesTests(SimpleTestCase):
+    def test_backend_renders_are_timed(self):
+        """Рендер через бэкенд шаблонов попадает в замер."""
+        template = engines['django'].from_string('{{ value }}')
+        self.assertIsInstance(engines['django'], TimedDjangoTemplates)
+        self.assertEqual(template.render({'value': 'вне замера'}),
+                         'вне замера')
+        with record_templates() as timer:
+            self.assertEqual(template.render({'value': 1}), '1')
+        self.assertGreater(timer.seconds, 0)
+        with record_templates() as idle:
+            pass
+        self.assertEqual(idle.seconds, 0)
@@ -0,0 +1,73 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import (RequestFactory, SimpleTestCase, TransactionTestCase,
+                         override_settings)
+
+from core import routers
+from core.middleware import PIN_COOKIE, ReplicaPinningMiddleware
+from core.replication import copy_database
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        routers.reset_pinning()
+        self.addCleanup(routers.reset_pinning)
+        self.router = routers.PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+
+    def test_reads_go_to_replica_until_write(self):
+        """Чтение идёт на реплику, после записи - на основную базу."""
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_writer_is_pinned_by_cookie(self):
+        """После записи пользователь читает с default, пока жива кука."""
+        def write_view(request):
+            self.router.db_for_write(Post)
+            return HttpResponse()
+
+        def read_view(request):
+            return HttpResponse(self.router.db_for_read(Post))
+
+        response = ReplicaPinningMiddleware(write_view)(
+            self.factory.post('/')
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertFalse(routers.is_pinned())
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        response = ReplicaPinningMiddleware(read_view)(request)
+        self.assertEqual(response.content, b'default')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        response = ReplicaPinningMiddleware(read_view)(self.factory.get('/'))
+        self.assertEqual(response.content, b'replica')
+
+
+@override_settings(TASKS_EAGER=True)
+class CopyDatabaseTests(TransactionTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_copy_makes_readable_replica(self):
+        """Копия основной базы читается как отдельный SQLite-файл."""
+        user = User.objects.create_user(username='copied')
+        Post.objects.create(author=user, text='Пост для реплики')
+        path = os.path.join(self.directory, 'replica.sqlite3')
+        copy_database('default', path)
+        replica = sqlite3.connect(path)
+        try:
+            rows = replica.execute('SELECT text FROM posts_post').fetchall()
+        finally:
+            replica.close()
+        self.assertEqual(rows, [('Пост для реплики',)])
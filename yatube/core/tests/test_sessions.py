@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+User = get_user_model()
+
+
+@override_settings(
+    SESSION_ENGINE='core.sessions', SESSION_SAVE_EVERY_REQUEST=True
+)
+class CoalescedSessionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='session')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def session_queries(self, url=reverse('about:author')):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        return [
+            query['sql'].split()[0] for query in queries
+            if 'django_session' in query['sql']
+        ]
+
+    def test_unchanged_session_is_not_written(self):
+        """Повторные запросы читают сессию из кэша и не пишут её."""
+        for _ in range(3):
+            self.assertEqual(self.session_queries(), [])
+
+    @override_settings(SESSION_REFRESH_INTERVAL=0)
+    def test_expiry_refresh_is_written_after_interval(self):
+        """После SESSION_REFRESH_INTERVAL продление пишется в базу."""
+        self.assertIn('UPDATE', self.session_queries())
+
+    def test_modified_session_is_written_at_once(self):
+        """Изменённая сессия пишется сразу, несмотря на свежую метку."""
+        session = self.client.session
+        session['theme'] = 'dark'
+        with CaptureQueriesContext(connection) as queries:
+            session.save()
+        self.assertTrue(
+            any(query['sql'].startswith('UPDATE') for query in queries)
+        )
+        self.assertEqual(self.client.session['theme'], 'dark')
+
+
+class SessionEngineTests(TestCase):
+    def test_local_cache_keeps_sessions_in_database(self):
+        """С LocMemCache сессии не кэшируются: кэш не общий."""
+        self.assertFalse(settings.SHARED_CACHE)
+        self.assertEqual(
+            settings.SESSION_ENGINE, 'django.contrib.sessions.backends.db'
+        )
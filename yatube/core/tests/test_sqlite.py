@@ -0,0 +1,42 @@
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from core.sqlite import estimated_rows
+from posts.models import Group
+
+
+class SqlitePragmasTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_connection_profile_is_applied(self):
+        """Новое соединение получает настройки из SQLITE_PRAGMAS."""
+        for name in ('busy_timeout', 'cache_size'):
+            with self.subTest(pragma=name):
+                self.assertEqual(
+                    self.pragma(name), settings.SQLITE_PRAGMAS[name]
+                )
+        self.assertEqual(self.pragma('synchronous'), 1)
+
+
+class OptimizeSqliteCommandTests(TransactionTestCase):
+    def test_optimize_command(self):
+        """optimize_sqlite отрабатывает на рабочей базе."""
+        out = StringIO()
+        call_command('optimize_sqlite', analyze=True, stdout=out)
+        self.assertIn('Готово', out.getvalue())
+
+    def test_row_estimate_comes_from_analyze(self):
+        """После ANALYZE число строк читается из sqlite_stat1."""
+        Group.objects.bulk_create(
+            Group(title=f'Группа {number}', slug=f'group-{number}')
+            for number in range(3)
+        )
+        call_command('optimize_sqlite', analyze=True, stdout=StringIO())
+        self.assertEqual(estimated_rows(Group), 3)
@@ -0,0 +1,129 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+
+from core.models import StoredFile
+from core.storage import (ContentAddressedStorage, delete_unreferenced,
+                          is_hashed)
+from posts.models import Post
+
+User = get_user_model()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+class ContentAddressedStorageTests(TransactionTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings = override_settings(
+            MEDIA_ROOT=self.media_root, TASKS_EAGER=True
+        )
+        self.settings.enable()
+        self.user = User.objects.create_user(username='storage')
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def post_with_image(self, name):
+        post = Post(author=self.user, text='Пост с картинкой')
+        post.image.save(name, ContentFile(SMALL_GIF), save=False)
+        post.save()
+        return post
+
+    def test_same_content_is_stored_once(self):
+        """Одинаковые файлы сохраняются один раз в шардированный путь."""
+        storage = ContentAddressedStorage()
+        first = storage.save('posts/one.gif', ContentFile(SMALL_GIF))
+        second = storage.save('posts/two.GIF', ContentFile(SMALL_GIF))
+        self.assertEqual(first, second)
+        self.assertTrue(is_hashed(first))
+        self.assertRegex(first, r'^posts/[0-9a-f]{2}/[0-9a-f]{2}/')
+        directory = os.path.dirname(storage.path(first))
+        self.assertEqual(len(os.listdir(directory)), 1)
+
+    def test_file_lives_while_referenced(self):
+        """Файл удаляется вместе с последним ссылающимся на него постом."""
+        first = self.post_with_image('one.gif')
+        second = self.post_with_image('two.gif')
+        name = first.image.name
+        self.assertEqual(name, second.image.name)
+        self.assertEqual(StoredFile.objects.get(name=name).refs, 2)
+        first.delete()
+        self.assertTrue(first.image.storage.exists(name))
+        second.delete()
+        self.assertFalse(StoredFile.objects.filter(name=name).exists())
+        self.assertFalse(first.image.storage.exists(name))
+
+    def test_rehash_media_moves_legacy_files(self):
+        """rehash_media переносит старые плоские пути в хешированные."""
+        os.makedirs(os.path.join(self.media_root, 'posts'))
+        legacy = os.path.join(self.media_root, 'posts', 'legacy.gif')
+        with open(legacy, 'wb') as file:
+            file.write(SMALL_GIF)
+        post = Post.objects.create(author=self.user, text='Старый пост')
+        Post.objects.filter(pk=post.pk).update(image='posts/legacy.gif')
+        call_command('rehash_media', batch_size=1, stdout=StringIO())
+        post.refresh_from_db()
+        self.assertTrue(is_hashed(post.image.name))
+        self.assertTrue(post.image.storage.exists(post.image.name))
+        self.assertFalse(os.path.exists(legacy))
+        self.assertEqual(StoredFile.objects.get(name=post.image.name).refs, 1)
+
+    def test_rehash_media_resets_thumbnails(self):
+        """После переноса миниатюры строятся заново, карточка обновляется."""
+        os.makedirs(os.path.join(self.media_root, 'posts'))
+        with open(os.path.join(self.media_root, 'posts', 'old.gif'),
+                  'wb') as file:
+            file.write(SMALL_GIF)
+        post = Post.objects.create(author=self.user, text='Старый пост')
+        Post.objects.filter(pk=post.pk).update(
+            image='posts/old.gif', thumbnail_widths='400,800'
+        )
+        call_command('rehash_media', stdout=StringIO())
+        moved = Post.objects.get(pk=post.pk)
+        self.assertEqual(moved.thumbnail_widths, '')
+        self.assertEqual(moved.version, post.version + 1)
+
+    def test_release_deletes_thumbnails(self):
+        """Вместе с последней ссылкой удаляются и миниатюры картинки."""
+        post = self.post_with_image('thumbs.gif')
+        directory = os.path.join(
+            self.media_root, 'thumbs',
+            os.path.splitext(post.image.name)[0],
+        )
+        self.assertTrue(os.listdir(directory))
+        post.delete()
+        self.assertEqual(os.listdir(directory), [])
+
+    def test_reacquired_file_is_not_deleted(self):
+        """Файл, на который снова сослались до удаления, остаётся."""
+        storage = ContentAddressedStorage()
+        name = storage.save('posts/race.gif', ContentFile(SMALL_GIF))
+        StoredFile.objects.create(name=name, refs=1)
+        delete_unreferenced(name, storage)
+        self.assertTrue(storage.exists(name))
+
+    def test_concurrent_save_keeps_hashed_name(self):
+        """Параллельная запись того же файла не добавляет суффикс к хешу."""
+        storage = ContentAddressedStorage()
+        name = storage.save('posts/one.gif', ContentFile(SMALL_GIF))
+        with mock.patch.object(storage, 'exists', return_value=False):
+            again = storage.save('posts/two.gif', ContentFile(SMALL_GIF))
+        self.assertEqual(again, name)
+        directory = os.path.dirname(storage.path(name))
+        self.assertEqual(os.listdir(directory), [os.path.basename(name)])
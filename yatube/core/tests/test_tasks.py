@@ -0,0 +1,36 @@
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from core import tasks
+
+
+class SubmitTests(SimpleTestCase):
+    def test_tasks_run_eagerly_under_tests(self):
+        """Под тестами задачи не уходят в процессы с чужой базой."""
+        self.assertTrue(settings.TASKS_EAGER)
+
+    def test_broken_pool_is_rebuilt(self):
+        """Сломанный пул пересоздаётся, задача уходит в новый."""
+        broken = mock.Mock()
+        broken.submit.side_effect = BrokenProcessPool
+        fresh = mock.Mock()
+        with mock.patch.object(
+            tasks, 'ProcessPoolExecutor', side_effect=[broken, fresh]
+        ), mock.patch.object(tasks, '_process_pool', None):
+            future = tasks.submit(print, 'задача')
+            self.assertIs(tasks._process_pool, fresh)
+        self.assertIs(future, fresh.submit.return_value)
+        broken.shutdown.assert_called_once_with(wait=False)
+
+    def test_submit_never_raises(self):
+        """Если пул ломается снова, задача теряется без исключения."""
+        broken = mock.Mock()
+        broken.submit.side_effect = BrokenProcessPool
+        with mock.patch.object(
+            tasks, 'ProcessPoolExecutor', return_value=broken
+        ), mock.patch.object(tasks, '_process_pool', None):
+            with self.assertLogs('core.tasks', 'ERROR'):
+                self.assertIsNone(tasks.submit(print, 'задача'))
@@ -0,0 +1,31 @@
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+from django.urls import path, reverse
+
+from core.templatetags.cached_urls import memo_reverse
+
+urlpatterns = [path('other/about/', lambda request: None, name='author')]
+
+
+class CachedUrlTests(SimpleTestCase):
+    def render(self, source):
+        return Template('{% load cached_urls %}' + source).render(Context())
+
+    def test_matches_url_tag(self):
+        """cached_url даёт тот же адрес, что и reverse, и запоминает его."""
+        memo_reverse.cache_clear()
+        for _ in range(2):
+            self.assertEqual(
+                self.render('{% cached_url "posts:profile" "leo" %}'),
+                reverse('posts:profile', args=['leo']),
+            )
+        self.assertEqual(memo_reverse.cache_info().hits, 1)
+
+    def test_memo_is_dropped_with_urlconf(self):
+        """Смена ROOT_URLCONF сбрасывает запомненные адреса."""
+        self.render('{% cached_url "about:author" %}')
+        with override_settings(ROOT_URLCONF=__name__):
+            self.assertEqual(
+                self.render('{% cached_url "author" %}'), '/other/about/'
+            )
+        self.assertEqual(memo_reverse.cache_info().currsize, 0)
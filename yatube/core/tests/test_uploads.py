@@ -0,0 +1,27 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.uploads import upload_too_large
+
+
+@override_settings(MAX_UPLOAD_SIZE=100)
+class LimitedUploadHandlerTests(SimpleTestCase):
+    def test_oversized_upload_stops_reading_body(self):
+        """После лимита тело дальше не разбирается, запрос помечен."""
+        request = RequestFactory().post('/', data={
+            'before': 'поле',
+            'image': SimpleUploadedFile('big.bin', b'x' * 1000),
+            'after': 'поле',
+        })
+        self.assertEqual(request.POST.get('before'), 'поле')
+        self.assertNotIn('after', request.POST)
+        self.assertNotIn('image', request.FILES)
+        self.assertTrue(upload_too_large(request))
+
+    def test_small_upload_is_accepted(self):
+        """Файл в пределах лимита доходит до FILES."""
+        request = RequestFactory().post('/', data={
+            'image': SimpleUploadedFile('small.bin', b'x' * 50),
+        })
+        self.assertEqual(request.FILES['image'].read(), b'x' * 50)
+        self.assertFalse(upload_too_large(request))
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.files.uploadhandler import (StopUpload,
+                                             TemporaryFileUploadHandler)
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+    """
+    Пишет загрузку во временный файл кусками. На первом куске сверх
+    MAX_UPLOAD_SIZE обрывает разбор, не дочитывая тело запроса, и
+    помечает запрос: форма ответит на это ошибкой размера.
+    """
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > settings.MAX_UPLOAD_SIZE:
+            self.request.upload_too_large = True
+            raise StopUpload(connection_reset=True)
+        return super().receive_data_chunk(raw_data, start)
+
+
+def upload_too_large(request):
+    """Оборвал ли LimitedUploadHandler загрузку; читать после request.POST."""
+    return getattr(request, 'upload_too_large', False)
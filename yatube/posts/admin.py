@@ -1,6 +1,8 @@
 from django.contrib import admin
 
-from .models import Group, Post
+from search import index
+
+from .models import ArchivedPost, Group, Post
 
 
 @admin.register(Group)
@@ -17,3 +19,17 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip() or not index.is_available():
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        return queryset.filter(pk__in=index.matching_ids(search_term)), False
+
+
+@admin.register(ArchivedPost)
+class ArchivedPostAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'text', 'pub_date', 'author', 'group',)
+    list_filter = ('pub_date',)
+    empty_value_display = '-пусто-'
@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.core.signals import request_finished
 
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .hits import flush_views_periodically
+        request_finished.connect(flush_views_periodically)
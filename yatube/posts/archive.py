@@ -0,0 +1,112 @@
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils.functional import cached_property
+
+from .cache import FEED_TAG, invalidate_tags
+from .models import ArchivedPost, Post
+from .signals import keep_counters
+
+ARCHIVE_FIELDS = (
+    'id', 'text', 'pub_date', 'updated_at', 'author_id', 'group_id',
+    'image', 'image_width', 'image_height', 'image_bytes',
+    'thumbnail_widths', 'version', 'comments_count', 'views',
+)
+
+
+class TieredPosts:
+    """
+    Посты группы или автора из горячей таблицы и архива одним списком.
+    Архивные посты всегда старше горячих, поэтому порядок -pub_date, -id
+    сохраняется простой склейкой. Paginator берёт count() и срезы,
+    CursorPaginator перебирает tiers.
+    """
+    ordered = True
+
+    def __init__(self, hot, archived):
+        self.tiers = (hot, archived)
+
+    @cached_property
+    def counts(self):
+        return tuple(tier.count() for tier in self.tiers)
+
+    def count(self):
+        return sum(self.counts)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            rows = self[key:key + 1]
+            if not rows:
+                raise IndexError(key)
+            return rows[0]
+        start = key.start or 0
+        stop = self.count() if key.stop is None else key.stop
+        rows = []
+        for tier, total in zip(self.tiers, self.counts):
+            if start < total and start < stop:
+                rows.extend(tier[start:min(stop, total)])
+            start = max(start - total, 0)
+            stop = max(stop - total, 0)
+        return rows
+
+
+def find_post(post_id, *related):
+    """Ищет пост по id сначала в горячей таблице, затем в архиве."""
+    for model in (Post, ArchivedPost):
+        post = model.objects.select_related(*related).filter(
+            pk=post_id
+        ).first()
+        if post is not None:
+            return post
+    return None
+
+
+def archive_boundary(cutoff):
+    """
+    Дата, раньше которой новый пост сразу уходит в архив: старше
+    cutoff или самого свежего архивного, но старше всех горячих, иначе
+    склейка TieredPosts перестанет быть упорядоченной. Совпадение даты
+    с границей оставляет пост горячим: его id больше существующих.
+    """
+    newest_archived = ArchivedPost.objects.aggregate(
+        newest=Max('pub_date')
+    )['newest']
+    oldest_hot = Post.objects.aggregate(oldest=Min('pub_date'))['oldest']
+    boundary = max(cutoff, newest_archived or cutoff)
+    if oldest_hot is not None:
+        boundary = min(boundary, oldest_hot)
+    return boundary
+
+
+@transaction.atomic
+def archive_batch(cutoff, batch_size):
+    """Переносит в архив до batch_size самых старых постов до cutoff."""
+    posts = list(
+        Post.objects.filter(pub_date__lt=cutoff)
+        .order_by('pub_date', 'pk')[:batch_size]
+    )
+    if not posts:
+        return 0
+    ArchivedPost.objects.bulk_create(
+        ArchivedPost(**{
+            field: getattr(post, field) for field in ARCHIVE_FIELDS
+        })
+        for post in posts
+    )
+    with keep_counters():
+        Post.objects.filter(pk__in=[post.pk for post in posts]).delete()
+    return len(posts)
+
+
+def archive_posts(cutoff, batch_size):
+    moved = 0
+    while True:
+        batch = archive_batch(cutoff, batch_size)
+        if not batch:
+            break
+        moved += batch
+        yield moved
+    if moved:
+        invalidate_tags(FEED_TAG)
@@ -0,0 +1,125 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+POST_CARD_TEMPLATE = 'includes/post_card.html'
+FEED_TAG = 'feed'
+
+
+def post_card_key(post, group=None):
+    in_group = 'g' if group else 'a'
+    return f'post_card:{post.pk}:{post.version}:{in_group}'
+
+
+def forget_post_card(post):
+    cache.delete_many(
+        [post_card_key(post, group) for group in (None, True)]
+    )
+
+
+def render_post_cards(posts, group=None):
+    """
+    Рендерит карточки постов страницы, забирая готовые фрагменты
+    из кэша одним get_many.
+    """
+    posts = list(posts)
+    keys = [post_card_key(post, group) for post in posts]
+    cached = cache.get_many(keys)
+    template = get_template(POST_CARD_TEMPLATE)
+    missing = {}
+    cards = []
+    for post, key in zip(posts, keys):
+        card = cached.get(key)
+        if card is None:
+            card = template.render({'post': post, 'group': group})
+            missing[key] = card
+        cards.append(mark_safe(card))
+    if missing:
+        cache.set_many(missing, settings.POST_CARD_CACHE_TIMEOUT)
+    return cards
+
+
+def group_tag(slug):
+    return f'group:{slug}'
+
+
+def author_tag(username):
+    return f'author:{username}'
+
+
+def tag_key(tag):
+    return f'page_tag:{tag}'
+
+
+def new_tag_version():
+    # Версия от времени: после вытеснения тега из кэша старые
+    # страницы не оживут со случайно совпавшей версией.
+    return time.time_ns()
+
+
+def tag_versions(tags):
+    keys = [tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            version = new_tag_version()
+            cache.add(key, version, None)
+            versions[key] = cache.get(key, version)
+    return [versions[key] for key in keys]
+
+
+def invalidate_tags(*tags):
+    for tag in set(tags):
+        try:
+            cache.incr(tag_key(tag))
+        except ValueError:
+            cache.set(tag_key(tag), new_tag_version(), None)
+
+
+def page_key(request, tags):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    versions = '.'.join(str(version) for version in tag_versions(tags))
+    return f'page:{path}:{versions}'
+
+
+def anonymous_page_cache(get_tags):
+    """
+    Кэширует страницу для анонимных GET-запросов. Ключ страницы
+    включает версии тегов из get_tags(**kwargs), поэтому
+    invalidate_tags сбрасывает только связанные с тегом страницы.
+    Без PAGE_CACHE страницы не кэшируются.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (
+                not settings.PAGE_CACHE
+                or request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated
+            ):
+                return view(request, *args, **kwargs)
+            key = page_key(request, get_tags(**kwargs))
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+            response = view(request, *args, **kwargs)
+            if (
+                response.status_code == 200
+                and not response.streaming
+                and not response.cookies
+            ):
+                cache.set(
+                    key,
+                    (response.content, response['Content-Type']),
+                    settings.PAGE_CACHE_TIMEOUT,
+                )
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,79 @@
+import hashlib
+
+from django.db.models import Max
+from django.views.decorators.http import condition
+
+from .cache import tag_versions
+from .models import ArchivedPost, Post
+
+
+def make_etag(*parts):
+    raw = ':'.join(str(part) for part in parts)
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def anonymous_condition(stamp):
+    """
+    condition() с валидаторами из stamp(request, **kwargs) -> (etag,
+    last_modified). Считается один раз на запрос и только для анонимов:
+    авторизованным страница рендерится с кнопками и именем в шапке.
+    """
+    def cached_stamp(request, *args, **kwargs):
+        if not hasattr(request, '_page_stamp'):
+            request._page_stamp = (None, None)
+            if request.user.is_anonymous:
+                request._page_stamp = stamp(request, **kwargs)
+        return request._page_stamp
+
+    return condition(
+        etag_func=lambda request, *args, **kwargs: cached_stamp(
+            request, **kwargs
+        )[0],
+        last_modified_func=lambda request, *args, **kwargs: cached_stamp(
+            request, **kwargs
+        )[1],
+    )
+
+
+def listing_condition(get_tags, get_tiers):
+    """
+    Валидаторы ленты: ETag из версий тегов кэша страниц (без запросов
+    к БД), Last-Modified из Max(updated_at) одним агрегатом по индексу.
+    Удаление поста Last-Modified не двигает, его ловит ETag.
+    """
+    def stamp(request, **kwargs):
+        latest = None
+        for posts in get_tiers(**kwargs):
+            latest = posts.order_by().aggregate(
+                latest=Max('updated_at')
+            )['latest']
+            if latest is not None:
+                break
+        etag = make_etag(
+            request.get_full_path(), *tag_versions(get_tags(**kwargs)),
+            latest and latest.isoformat(),
+        )
+        return etag, latest
+    return anonymous_condition(stamp)
+
+
+def post_stamp(request, post_id):
+    """
+    Валидаторы страницы поста одним запросом: время правки, версия
+    карточки (растёт при смене автора или группы) и счётчик постов автора.
+    """
+    for model in (Post, ArchivedPost):
+        row = model.objects.filter(pk=post_id).values_list(
+            'updated_at', 'version', 'author__post_counter__posts_count'
+        ).first()
+        if row is not None:
+            updated_at, version, posts_count = row
+            return (
+                make_etag(model.__name__, post_id, version, posts_count,
+                          updated_at.isoformat()),
+                updated_at,
+            )
+    return None, None
+
+
+post_condition = anonymous_condition(post_stamp)
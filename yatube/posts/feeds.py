@@ -0,0 +1,207 @@
+import hashlib
+import json
+import re
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from django.db.models import Max
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.feedgenerator import rfc2822_date, rfc3339_date
+from django.utils.text import Truncator
+from django.views.decorators.http import condition
+
+from .cache import FEED_TAG, author_tag, group_tag, tag_versions
+from .models import Group, Post, User
+
+# Символы, запрещённые в XML 1.0 даже в экранированном виде.
+XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+CONTENT_TYPES = {
+    'rss': 'application/rss+xml; charset=utf-8',
+    'atom': 'application/atom+xml; charset=utf-8',
+    'json': 'application/feed+json; charset=utf-8',
+}
+
+
+def feed_source(slug=None, username=None):
+    """Возвращает (queryset постов, тег кэша) для ленты."""
+    if slug is not None:
+        return Post.objects.filter(group__slug=slug), group_tag(slug)
+    if username is not None:
+        return (
+            Post.objects.filter(author__username=username),
+            author_tag(username),
+        )
+    return Post.objects.all(), FEED_TAG
+
+
+def feed_stamp(request, fmt, slug=None, username=None):
+    """
+    Валидаторы ленты: дата самого нового поста одним агрегатом и
+    версия тега из кэша, которая меняется при любой записи в ленту.
+    Считается один раз на запрос.
+    """
+    if not hasattr(request, '_feed_stamp'):
+        posts, tag = feed_source(slug, username)
+        latest = posts.order_by().aggregate(latest=Max('pub_date'))['latest']
+        etag = None
+        if latest is not None:
+            raw = f'{fmt}:{latest.isoformat()}:{tag_versions([tag])[0]}'
+            etag = hashlib.md5(raw.encode()).hexdigest()
+        request._feed_stamp = (etag, latest)
+    return request._feed_stamp
+
+
+def feed_etag(request, **kwargs):
+    return feed_stamp(request, **kwargs)[0]
+
+
+def feed_last_modified(request, **kwargs):
+    return feed_stamp(request, **kwargs)[1]
+
+
+def feed_items(posts):
+    return (
+        posts.select_related('author', 'group')
+        .order_by('-pub_date', '-id')[:settings.FEED_SIZE]
+        .iterator(chunk_size=settings.FEED_CHUNK_SIZE)
+    )
+
+
+def xml_text(value):
+    """Экранирует строку для XML, выбрасывая недопустимые символы."""
+    return escape(XML_ILLEGAL.sub('', value))
+
+
+def item_fields(request, post):
+    return {
+        'title': Truncator(post.text).chars(50),
+        'link': request.build_absolute_uri(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        ),
+        'author': post.author.get_full_name() or post.author.username,
+        'group': post.group.title if post.group else None,
+    }
+
+
+def rss(request, title, link, posts):
+    yield (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/">'
+        f'<channel><title>{xml_text(title)}</title>'
+        f'<link>{escape(link)}</link>'
+        f'<description>{xml_text(title)}</description>'
+    )
+    for post in posts:
+        item = item_fields(request, post)
+        category = ''
+        if item['group']:
+            category = f'<category>{xml_text(item["group"])}</category>'
+        # <author> в RSS - только e-mail, имя идёт в dc:creator.
+        yield (
+            f'<item><title>{xml_text(item["title"])}</title>'
+            f'<link>{escape(item["link"])}</link>'
+            f'<guid>{escape(item["link"])}</guid>'
+            f'<description>{xml_text(post.text)}</description>'
+            f'<dc:creator>{xml_text(item["author"])}</dc:creator>'
+            f'{category}'
+            f'<pubDate>{rfc2822_date(post.pub_date)}</pubDate></item>'
+        )
+    yield '</channel></rss>'
+
+
+def atom(request, title, link, posts):
+    yield (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom">'
+        f'<title>{xml_text(title)}</title><id>{escape(link)}</id>'
+        f'<link href={quoteattr(link)}/>'
+    )
+    updated = False
+    for post in posts:
+        if not updated:
+            yield f'<updated>{rfc3339_date(post.pub_date)}</updated>'
+            updated = True
+        item = item_fields(request, post)
+        yield (
+            f'<entry><title>{xml_text(item["title"])}</title>'
+            f'<link href={quoteattr(item["link"])}/>'
+            f'<id>{escape(item["link"])}</id>'
+            f'<author><name>{xml_text(item["author"])}</name></author>'
+            f'<updated>{rfc3339_date(post.pub_date)}</updated>'
+            f'<content type="text">{xml_text(post.text)}</content></entry>'
+        )
+    if not updated:
+        # <updated> у ленты обязателен и для пустой ленты.
+        yield f'<updated>{rfc3339_date(timezone.now())}</updated>'
+    yield '</feed>'
+
+
+def json_feed(request, title, link, posts):
+    header = {
+        'version': 'https://jsonfeed.org/version/1.1',
+        'title': title,
+        'home_page_url': link,
+    }
+    yield json.dumps(header, ensure_ascii=False)[:-1] + ', "items": ['
+    separator = ''
+    for post in posts:
+        item = item_fields(request, post)
+        entry = {
+            'id': item['link'],
+            'url': item['link'],
+            'title': item['title'],
+            'content_text': post.text,
+            'date_published': rfc3339_date(post.pub_date),
+            'authors': [{'name': item['author']}],
+        }
+        if item['group']:
+            entry['tags'] = [item['group']]
+        yield separator + json.dumps(entry, ensure_ascii=False)
+        separator = ', '
+    yield ']}'
+
+
+WRITERS = {'rss': rss, 'atom': atom, 'json': json_feed}
+
+
+def stream_feed(request, fmt, title, url, posts):
+    writer = WRITERS[fmt]
+    link = request.build_absolute_uri(url)
+    return StreamingHttpResponse(
+        writer(request, title, link, feed_items(posts)),
+        content_type=CONTENT_TYPES[fmt],
+    )
+
+
+@condition(etag_func=feed_etag, last_modified_func=feed_last_modified)
+def index_feed(request, fmt):
+    posts = feed_source()[0]
+    return stream_feed(
+        request, fmt, 'Последние обновления на сайте',
+        reverse('posts:index'), posts,
+    )
+
+
+@condition(etag_func=feed_etag, last_modified_func=feed_last_modified)
+def group_feed(request, fmt, slug):
+    group = get_object_or_404(Group, slug=slug)
+    posts = feed_source(slug=slug)[0]
+    return stream_feed(
+        request, fmt, f'Записи сообщества: {group.title}',
+        reverse('posts:group_list', kwargs={'slug': slug}), posts,
+    )
+
+
+@condition(etag_func=feed_etag, last_modified_func=feed_last_modified)
+def profile_feed(request, fmt, username):
+    author = get_object_or_404(User, username=username)
+    posts = feed_source(username=username)[0]
+    return stream_feed(
+        request, fmt,
+        f'Все посты пользователя {author.get_full_name() or username}',
+        reverse('posts:profile', kwargs={'username': username}), posts,
+    )
@@ -1,13 +1,48 @@
 from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.template.defaultfilters import filesizeformat
+from PIL import Image
 
-from .models import Post
+from .images import normalize_image
+from .models import Comment, Post
 
 
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
-        fields = ('group', 'text')
+        fields = ('group', 'text', 'image')
         labels = {
             'text': 'текст',
             'group': 'группа',
         }
+
+    def __init__(self, *args, image_too_large=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Оборванную LimitedUploadHandler загрузку в FILES нет:
+        # форма сообщает о размере, а не о пустом поле.
+        self.image_too_large = image_too_large
+
+    def clean_image(self):
+        if self.image_too_large:
+            raise forms.ValidationError(
+                'Файл больше '
+                f'{filesizeformat(settings.MAX_UPLOAD_SIZE)}.'
+            )
+        image = self.cleaned_data.get('image')
+        if not isinstance(image, UploadedFile):
+            return image
+        # Проверка ImageField читает только заголовок: обрезанный файл
+        # или «бомба» всплывают при декодировании.
+        try:
+            return normalize_image(image)
+        except (OSError, Image.DecompressionBombError):
+            raise forms.ValidationError(
+                'Файл повреждён или слишком велик для обработки.'
+            )
+
+
+class CommentForm(forms.ModelForm):
+    class Meta:
+        model = Comment
+        fields = ('text',)
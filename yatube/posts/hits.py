@@ -0,0 +1,307 @@
+import atexit
+import glob
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from functools import wraps
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+
+from .models import ArchivedPost, Post
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_NAME = re.compile(r'^views-([0-9a-f]{32})\.')
+# Держим IN (...) ниже лимита переменных SQLite.
+CHUNK_SIZE = 500
+
+
+def apply_views(counts):
+    """
+    Прибавляет просмотры одной транзакцией: по UPDATE на каждое
+    значение прироста. Пост мог уехать в архив, поэтому обновляются
+    обе таблицы; version и updated_at не трогаются, кэш страниц живёт.
+    """
+    by_amount = defaultdict(list)
+    for post_id, amount in counts.items():
+        by_amount[amount].append(post_id)
+    with transaction.atomic():
+        for amount, ids in by_amount.items():
+            for start in range(0, len(ids), CHUNK_SIZE):
+                chunk = ids[start:start + CHUNK_SIZE]
+                for model in (Post, ArchivedPost):
+                    model.objects.filter(pk__in=chunk).update(
+                        views=F('views') + amount
+                    )
+
+
+def read_journal(path):
+    with open(path) as journal:
+        return Counter(int(line) for line in journal if line.strip())
+
+
+def lock_path(directory, token):
+    return os.path.join(directory, f'views-{token}.lock')
+
+
+def owner_alive(directory, token):
+    """
+    Владелец журналов жив, пока держит flock на своём .lock: замок
+    снимает ядро, когда процесс умирает, поэтому повторно выданный
+    PID живость не подделает.
+    """
+    if fcntl is None:
+        # Без flock живость не проверить: журналы досчитает только
+        # flush_views.
+        return True
+    with open(lock_path(directory, token), 'a') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+    return False
+
+
+def apply_journal(path, claimed):
+    """
+    Забирает чужой журнал переименованием под claimed и применяет его.
+    Возвращает число просмотров, 0 - если журнал уже забрали.
+    """
+    try:
+        os.replace(path, claimed)
+    except FileNotFoundError:
+        return 0
+    try:
+        counts = read_journal(claimed)
+        apply_views(counts)
+    except (DatabaseError, ValueError):
+        os.replace(claimed, path)
+        raise
+    os.remove(claimed)
+    return sum(counts.values())
+
+
+def recover_journals(directory=None):
+    """
+    Досчитывает журналы процессов, которые упали, не успев применить
+    просмотры. Журнал сначала переименовывается под текущий процесс,
+    чтобы его не забрали дважды. Возвращает число просмотров.
+    """
+    directory = directory or settings.VIEW_JOURNAL_DIR
+    if not directory:
+        return 0
+    total = 0
+    token = views_buffer.token
+    dead = set()
+    for path in glob.glob(os.path.join(directory, 'views-*.log')):
+        match = JOURNAL_NAME.match(os.path.basename(path))
+        if match is None or match.group(1) == token:
+            continue
+        owner = match.group(1)
+        if owner not in dead and owner_alive(directory, owner):
+            continue
+        dead.add(owner)
+        total += apply_journal(path, os.path.join(
+            directory, f'views-{token}.claimed-{os.path.basename(path)}'
+        ))
+    for owner in dead:
+        try:
+            os.remove(lock_path(directory, owner))
+        except FileNotFoundError:
+            pass
+    return total
+
+
+class ViewBuffer:
+    """
+    Просмотры постов копятся в памяти процесса и пишутся в базу одной
+    транзакцией раз в VIEW_FLUSH_INTERVAL секунд или после
+    VIEW_FLUSH_THRESHOLD просмотров. С VIEW_JOURNAL_DIR каждый
+    просмотр дописывается в журнал процесса, а журнал удаляется только
+    после коммита: просмотры упавшего процесса досчитываются из него,
+    возможно повторно. Без журнала при падении теряется не больше
+    одного буфера. Журналы названы случайным токеном процесса, пока
+    процесс жив, он держит flock на views-<токен>.lock. При
+    VIEW_FLUSH_THREAD буфер сбрасывает и фоновый поток, когда запросов
+    нет, и выход процесса.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flushing = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._token = uuid.uuid4().hex
+        self._counts = Counter()
+        self._hits = 0
+        self._journal = None
+        self._owner_lock = None
+        self._segments = []
+        self._sequence = 0
+        self._last_flush = time.monotonic()
+        self._flusher = None
+
+    def _check_fork(self):
+        # После fork буфер и журнал принадлежат родителю: копии его
+        # файлов закрываются, flock остаётся за родителем.
+        if self._pid != os.getpid():
+            for handle in (self._journal, self._owner_lock):
+                if handle is not None:
+                    handle.close()
+            self._reset()
+
+    @property
+    def token(self):
+        with self._lock:
+            self._check_fork()
+            return self._token
+
+    def journal_path(self, suffix=''):
+        return os.path.join(
+            settings.VIEW_JOURNAL_DIR, f'views-{self._token}{suffix}.log'
+        )
+
+    def _open_journal(self):
+        os.makedirs(settings.VIEW_JOURNAL_DIR, exist_ok=True)
+        if self._owner_lock is None:
+            self._owner_lock = open(
+                lock_path(settings.VIEW_JOURNAL_DIR, self._token), 'a'
+            )
+            if fcntl is not None:
+                fcntl.flock(self._owner_lock, fcntl.LOCK_EX)
+        self._journal = open(self.journal_path(), 'a')
+
+    def _start_flusher(self):
+        # Потоки не переживают fork: после него поток поднимается заново.
+        if self._flusher is not None or not settings.VIEW_FLUSH_THREAD:
+            return
+        self._flusher = threading.Thread(
+            target=self._flush_forever, name='views-flusher', daemon=True
+        )
+        self._flusher.start()
+        atexit.register(self.flush_quietly)
+
+    def _flush_forever(self):
+        pid = self._pid
+        while pid == os.getpid():
+            time.sleep(settings.VIEW_FLUSH_INTERVAL)
+            if self.is_due():
+                self.flush_quietly()
+
+    def flush_quietly(self):
+        """flush() для фона: ошибки базы только в лог."""
+        try:
+            self.flush()
+        except DatabaseError:
+            logger.exception('Не удалось записать просмотры постов')
+        finally:
+            if threading.current_thread() is self._flusher:
+                connection.close()
+
+    def hit(self, post_id):
+        with self._lock:
+            self._check_fork()
+            self._start_flusher()
+            self._counts[post_id] += 1
+            self._hits += 1
+            if settings.VIEW_JOURNAL_DIR:
+                if self._journal is None:
+                    self._open_journal()
+                self._journal.write(f'{post_id}\n')
+                self._journal.flush()
+
+    def pending(self, post_id):
+        """Просмотры поста, ещё не записанные этим процессом."""
+        with self._lock:
+            return self._counts.get(post_id, 0)
+
+    def is_due(self):
+        return self._hits and (
+            self._hits >= settings.VIEW_FLUSH_THRESHOLD
+            or time.monotonic() - self._last_flush
+            >= settings.VIEW_FLUSH_INTERVAL
+        )
+
+    def _take(self):
+        """Забирает буфер и закрывает текущий сегмент журнала."""
+        with self._lock:
+            self._check_fork()
+            counts, self._counts = self._counts, Counter()
+            self._hits = 0
+            self._last_flush = time.monotonic()
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+                self._sequence += 1
+                segment = self.journal_path(f'.{self._sequence}')
+                os.replace(self.journal_path(), segment)
+                self._segments.append(segment)
+            return counts, list(self._segments)
+
+    def flush(self):
+        """Применяет накопленные просмотры. Возвращает число постов."""
+        if not self._flushing.acquire(blocking=False):
+            return 0
+        try:
+            counts, segments = self._take()
+            if not counts:
+                return 0
+            try:
+                apply_views(counts)
+            except DatabaseError:
+                # Вернём в буфер: сегменты остаются до удачной записи.
+                with self._lock:
+                    self._counts.update(counts)
+                    self._hits += sum(counts.values())
+                raise
+            with self._lock:
+                for segment in segments:
+                    self._segments.remove(segment)
+            for segment in segments:
+                os.remove(segment)
+            return len(counts)
+        finally:
+            self._flushing.release()
+
+
+views_buffer = ViewBuffer()
+
+
+def count_view(view):
+    """
+    Засчитывает просмотр поста после ответа 200 или 304: condition()
+    отвечает 304, не вызывая view, и такой просмотр тоже считается.
+    Число на странице приблизительное: в нём нет просмотров, ещё не
+    сброшенных другими процессами, а анониму страница может прийти
+    как 304 или из кэша со старым числом - просмотры не меняют ETag.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            views_buffer.hit(kwargs['post_id'])
+        return response
+    return wrapper
+
+
+def flush_views_periodically(sender, **kwargs):
+    """После ответа сбрасывает буфер, если подошёл срок или порог."""
+    if not views_buffer.is_due():
+        return
+    try:
+        views_buffer.flush()
+        recover_journals()
+    except DatabaseError:
+        logger.exception('Не удалось записать просмотры постов')
@@ -0,0 +1,36 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+
+def normalize_image(uploaded):
+    """
+    Приводит загруженную картинку к IMAGE_MAX_SIZE по большей стороне:
+    JPEG для непрозрачных, PNG для картинок с прозрачностью. Исходник
+    не хранится, и sorl режет превью уже из уменьшенного файла.
+    """
+    uploaded.seek(0)
+    image = Image.open(uploaded)
+    limit = settings.IMAGE_MAX_SIZE
+    # JPEG декодируется сразу в уменьшенном масштабе.
+    image.draft('RGB', (limit, limit))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((limit, limit), Image.LANCZOS)
+    transparent = image.mode in ('RGBA', 'LA') or (
+        image.mode == 'P' and 'transparency' in image.info
+    )
+    output = BytesIO()
+    if transparent:
+        image.convert('RGBA').save(output, 'PNG', optimize=True)
+        extension = '.png'
+    else:
+        image.convert('RGB').save(
+            output, 'JPEG', quality=settings.IMAGE_JPEG_QUALITY,
+            optimize=True, progressive=True,
+        )
+        extension = '.jpg'
+    name = os.path.splitext(os.path.basename(uploaded.name))[0] + extension
+    return ContentFile(output.getvalue(), name=name)
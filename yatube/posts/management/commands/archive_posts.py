@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.archive import archive_posts
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит посты старше --days дней в таблицу архива пачками. '
+        'Профиль, группа и страница поста продолжают их показывать.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.ARCHIVE_AFTER_DAYS
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        moved = 0
+        for moved in archive_posts(cutoff, options['batch_size']):
+            self.stdout.write(f'Перенесено: {moved}')
+        self.stdout.write(f'Всего в архив: {moved}')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.hits import recover_journals
+
+
+class Command(BaseCommand):
+    help = (
+        'Досчитывает просмотры из журналов упавших процессов '
+        '(VIEW_JOURNAL_DIR). Запускайте по cron или после рестарта.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--directory', help='Каталог журналов вместо VIEW_JOURNAL_DIR.'
+        )
+
+    def handle(self, *args, **options):
+        total = recover_journals(options['directory'])
+        self.stdout.write(f'Досчитано просмотров: {total}')
@@ -0,0 +1,130 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F
+
+from posts.models import (ArchivedPost, AuthorCounter, Comment, Follow, Group,
+                          Post, User)
+
+
+def batches(queryset, batch_size):
+    last_pk = None
+    while True:
+        batch = queryset.order_by('pk')
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        pks = list(batch.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return
+        yield pks
+        last_pk = pks[-1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет счётчики постов авторов и групп с таблицами постов, '
+        'счётчики подписчиков авторов с подписками и счётчики '
+        'комментариев постов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        fixed_groups = sum(
+            self.reconcile_groups(pks)
+            for pks in batches(Group.objects.all(), batch_size)
+        )
+        fixed_authors = sum(
+            self.reconcile_authors(pks)
+            for pks in batches(User.objects.all(), batch_size)
+        )
+        fixed_posts = sum(
+            self.reconcile_comments(model, pks)
+            for model in (Post, ArchivedPost)
+            for pks in batches(model.objects.all(), batch_size)
+        )
+        self.stdout.write(
+            f'Исправлено групп: {fixed_groups}, авторов: {fixed_authors}, '
+            f'постов: {fixed_posts}'
+        )
+
+    @staticmethod
+    def count_posts(field, pks):
+        totals = Counter()
+        for model in (Post, ArchivedPost):
+            totals.update(dict(
+                model.objects.filter(**{f'{field}__in': pks})
+                .order_by()
+                .values_list(field)
+                .annotate(total=Count('pk'))
+            ))
+        return totals
+
+    @transaction.atomic
+    def reconcile_groups(self, pks):
+        actual = self.count_posts('group_id', pks)
+        fixed = 0
+        for pk, stored in Group.objects.filter(pk__in=pks).values_list(
+            'pk', 'posts_count'
+        ):
+            if stored != actual.get(pk, 0):
+                Group.objects.filter(pk=pk).update(
+                    posts_count=actual.get(pk, 0)
+                )
+                fixed += 1
+        return fixed
+
+    @transaction.atomic
+    def reconcile_authors(self, pks):
+        posts = self.count_posts('author_id', pks)
+        followers = dict(
+            Follow.objects.filter(author_id__in=pks)
+            .order_by()
+            .values_list('author_id')
+            .annotate(total=Count('pk'))
+        )
+        stored = {
+            user_id: counts for user_id, *counts in
+            AuthorCounter.objects.filter(user_id__in=pks).values_list(
+                'user_id', 'posts_count', 'followers_count'
+            )
+        }
+        missing = []
+        fixed = 0
+        for pk in pks:
+            counts = [posts.get(pk, 0), followers.get(pk, 0)]
+            if pk not in stored:
+                missing.append(AuthorCounter(
+                    user_id=pk, posts_count=counts[0],
+                    followers_count=counts[1],
+                ))
+            elif stored[pk] != counts:
+                AuthorCounter.objects.filter(user_id=pk).update(
+                    posts_count=counts[0], followers_count=counts[1]
+                )
+                fixed += 1
+        AuthorCounter.objects.bulk_create(missing)
+        return fixed + len(missing)
+
+    @transaction.atomic
+    def reconcile_comments(self, model, pks):
+        actual = dict(
+            Comment.objects.filter(post_id__in=pks)
+            .order_by()
+            .values_list('post_id')
+            .annotate(total=Count('pk'))
+        )
+        fixed = 0
+        for pk, stored in model.objects.filter(pk__in=pks).values_list(
+            'pk', 'comments_count'
+        ):
+            if stored != actual.get(pk, 0):
+                model.objects.filter(pk=pk).update(
+                    comments_count=actual.get(pk, 0),
+                    version=F('version') + 1,
+                )
+                fixed += 1
+        return fixed
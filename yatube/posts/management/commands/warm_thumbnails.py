@@ -0,0 +1,68 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.tasks import setup_worker
+from posts.models import ArchivedPost, Post
+from posts.thumbnails import generate_thumbnails
+
+
+class Command(BaseCommand):
+    help = (
+        'Параллельно строит наборы миниатюр для картинок горячих '
+        'и архивных постов, у которых их ещё нет.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.TASK_PROCESS_WORKERS
+        )
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        done = failed = 0
+        start = time.perf_counter()
+        with ProcessPoolExecutor(
+            max_workers=options['workers'],
+            mp_context=get_context('spawn'),
+            initializer=setup_worker,
+        ) as pool:
+            for model in (Post, ArchivedPost):
+                posts = model.objects.exclude(image='').filter(
+                    thumbnail_widths=''
+                ).order_by('pk')
+                model_done, model_failed = self.warm(
+                    pool, posts, options['batch_size']
+                )
+                done += model_done
+                failed += model_failed
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'Готово: {done}, ошибок: {failed}, за {elapsed:.1f} с'
+        )
+
+    def warm(self, pool, posts, batch_size):
+        last_pk = 0
+        done = failed = 0
+        while True:
+            rows = list(
+                posts.filter(pk__gt=last_pk)
+                .values_list('pk', 'image')[:batch_size]
+            )
+            if not rows:
+                return done, failed
+            last_pk = rows[-1][0]
+            batch = [name for pk, name in rows]
+            futures = [
+                pool.submit(generate_thumbnails, name) for name in batch
+            ]
+            for name, future in zip(batch, futures):
+                try:
+                    future.result()
+                    done += 1
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
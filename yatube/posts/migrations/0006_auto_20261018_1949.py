@@ -0,0 +1,48 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+
+
+def fill_counters(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    AuthorCounter = apps.get_model('posts', 'AuthorCounter')
+    posts = Post.objects.order_by()
+    for group_id, total in (
+        posts.exclude(group=None).values_list('group_id')
+        .annotate(total=Count('pk'))
+    ):
+        Group.objects.filter(pk=group_id).update(posts_count=total)
+    AuthorCounter.objects.bulk_create(
+        AuthorCounter(user_id=author_id, posts_count=total)
+        for author_id, total in (
+            posts.values_list('author_id').annotate(total=Count('pk'))
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0005_auto_20261018_1948'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='post_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('posts_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
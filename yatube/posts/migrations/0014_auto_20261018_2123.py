@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-18 21:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_auto_20261018_2113'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedpost',
+            name='thumbnail_widths',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='thumbnail_widths',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+    ]
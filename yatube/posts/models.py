@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from core.storage import ContentAddressedStorage
+
 User = get_user_model()
 
 
@@ -8,6 +10,7 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True, max_length=200)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.title
@@ -23,6 +26,7 @@ class Post(models.Model):
     )
     text = models.TextField()
     pub_date = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -31,11 +35,178 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True
     )
+    image_width = models.PositiveIntegerField(null=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, editable=False)
+    image_bytes = models.PositiveIntegerField(null=True, editable=False)
+    thumbnail_widths = models.CharField(
+        max_length=100, blank=True, editable=False
+    )
+    version = models.PositiveIntegerField(default=1, editable=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    views = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.text[:15]
 
     class Meta:
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
+        indexes = (
+            models.Index(fields=('pub_date', 'id')),
+            models.Index(fields=('group', 'pub_date')),
+            models.Index(fields=('author', 'pub_date')),
+        )
+
+
+class ArchivedPost(models.Model):
+    """Холодный пост: перенесён из Post командой archive_posts с тем же id."""
+    id = models.IntegerField(primary_key=True)
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+    )
+    text = models.TextField()
+    pub_date = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts'
+    )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        storage=ContentAddressedStorage(),
+        blank=True
+    )
+    image_width = models.PositiveIntegerField(null=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, editable=False)
+    image_bytes = models.PositiveIntegerField(null=True, editable=False)
+    thumbnail_widths = models.CharField(
+        max_length=100, blank=True, editable=False
+    )
+    version = models.PositiveIntegerField(default=1, editable=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    views = models.PositiveIntegerField(default=0, editable=False)
+
+    def __str__(self):
+        return self.text[:15]
+
+    class Meta:
+        ordering = ('-pub_date', '-id')
+        indexes = (
+            models.Index(fields=('group', 'pub_date')),
+            models.Index(fields=('author', 'pub_date')),
+        )
+
+
+class Comment(models.Model):
+    # Без внешнего ключа в БД: при переносе поста в архив комментарии
+    # остаются на месте и находятся по тому же post_id.
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='comments',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='comments',
+    )
+    text = models.TextField('Текст комментария')
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.text[:15]
+
+    class Meta:
+        ordering = ('created', 'id')
+        indexes = (
+            models.Index(fields=('post', 'created')),
+        )
+
+
+class AuthorCounter(models.Model):
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='post_counter',
+    )
+    posts_count = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.user_id}: {self.posts_count}'
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following',
+    )
+
+    def __str__(self):
+        return f'{self.user_id} -> {self.author_id}'
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'), name='unique_follow'
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='no_self_follow',
+            ),
+        )
+
+
+class TimelineEntry(models.Model):
+    """Пост в ленте подписок пользователя, разложенный при публикации."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'), name='unique_timeline_post'
+            ),
+        )
+        indexes = (
+            models.Index(fields=('user', 'pub_date', 'post')),
+            models.Index(fields=('user', 'author')),
+        )
+
+
+def author_posts_count(author):
+    """Число постов автора из счётчика, без COUNT по таблице постов."""
+    try:
+        return author.post_counter.posts_count
+    except AuthorCounter.DoesNotExist:
+        return 0
@@ -0,0 +1,220 @@
+import base64
+import binascii
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from core.sqlite import estimated_rows
+
+from .cache import tag_versions
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_cursor(direction, post):
+    raw = f'{direction}{post.pub_date.isoformat()}|{post.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Возвращает (direction, pub_date, pk) или None для битого курсора."""
+    try:
+        padding = '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(token + padding).decode()
+        direction, rest = raw[0], raw[1:]
+        pub_date, pk = rest.rsplit('|', 1)
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, IndexError, ValueError):
+        return None
+    if direction not in (NEXT, PREVIOUS) or pub_date is None:
+        return None
+    return direction, pub_date, pk
+
+
+class NumberedPage(Page):
+    @cached_property
+    def elided_page_range(self):
+        return list(self.paginator.get_elided_page_range(self.number))
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Нумерованная пагинация, которая не считает COUNT(*) на каждый
+    запрос: число постов лежит в кэше под версиями тегов ленты, и
+    запись или удаление поста сбрасывает его вместе со страницами
+    (только при PAGE_CACHE, иначе COUNT(*) каждый раз).
+    Для неотфильтрованной таблицы больше PAGE_COUNT_ESTIMATE_ABOVE
+    строк берётся оценка из статистики SQLite; последние страницы
+    при этом могут оказаться пустыми.
+    """
+    is_cursor = False
+    ELLIPSIS = '…'
+
+    def __init__(self, object_list, per_page, tags=(), **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.tags = list(tags)
+
+    @cached_property
+    def count(self):
+        if not self.tags:
+            return super().count
+        if not settings.PAGE_CACHE:
+            return self.uncached_count()
+        versions = '.'.join(str(v) for v in tag_versions(self.tags))
+        key = f'page_count:{"|".join(self.tags)}:{versions}'
+        count = cache.get(key)
+        if count is None:
+            count = self.uncached_count()
+            cache.set(key, count, settings.PAGE_COUNT_TIMEOUT)
+        return count
+
+    def uncached_count(self):
+        count = self.estimated_count()
+        if count is None:
+            count = super().count
+        return count
+
+    def estimated_count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet) or queryset.query.where:
+            return None
+        table = queryset.model._meta.db_table
+        # Статистика меняется только после ANALYZE, её хватает надолго.
+        rows = cache.get_or_set(
+            f'table_rows:{queryset.db}:{table}',
+            lambda: estimated_rows(queryset.model, queryset.db) or 0,
+            settings.SQLITE_OPTIMIZE_INTERVAL,
+        )
+        if rows < settings.PAGE_COUNT_ESTIMATE_ABOVE:
+            return None
+        return rows
+
+    def get_elided_page_range(self, number=1, on_each_side=3, on_ends=2):
+        """
+        Номера страниц вокруг текущей и по краям, пропуски заменены
+        на ELLIPSIS. Тот же алгоритм, что в Paginator Django 3.2.
+        """
+        number = self.validate_number(number)
+        if self.num_pages <= (on_each_side + on_ends) * 2:
+            yield from self.page_range
+            return
+        if number > 1 + on_each_side + on_ends + 1:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < self.num_pages - on_each_side - on_ends - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            yield from range(self.num_pages - on_ends + 1, self.num_pages + 1)
+        else:
+            yield from range(number + 1, self.num_pages + 1)
+
+    def _get_page(self, *args, **kwargs):
+        return NumberedPage(*args, **kwargs)
+
+
+class CursorPage(Page):
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<Page cursor>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return encode_cursor(NEXT, self.object_list[-1])
+        return None
+
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return encode_cursor(PREVIOUS, self.object_list[0])
+        return None
+
+    def start_index(self):
+        return None
+
+    def end_index(self):
+        return None
+
+
+class CursorPaginator(Paginator):
+    """
+    Keyset-пагинация по (pub_date, id): страница выбирается условием
+    WHERE по индексу, без COUNT(*) и OFFSET.
+    """
+    is_cursor = True
+
+    def page_for_cursor(self, token=None):
+        cursor = decode_cursor(token) if token else None
+        if cursor is None:
+            rows = self._fetch(NEXT)
+            return self._make_page(rows, NEXT, has_cursor=False)
+        direction, pub_date, pk = cursor
+        rows = self._fetch(direction, self._seek(direction, pub_date, pk))
+        return self._make_page(rows, direction, has_cursor=True)
+
+    def get_page(self, token):
+        return self.page_for_cursor(token)
+
+    def _fetch(self, direction, seek=None):
+        """
+        Набирает per_page + 1 строк по уровням (см. posts.archive):
+        вперёд от новых к старым, назад в обратном порядке.
+        """
+        tiers = getattr(self.object_list, 'tiers', (self.object_list,))
+        if direction == PREVIOUS:
+            tiers = reversed(tiers)
+        rows = []
+        for tier in tiers:
+            queryset = self._ordered(tier, direction)
+            if seek is not None:
+                queryset = queryset.filter(seek)
+            rows.extend(queryset[:self.per_page + 1 - len(rows)])
+            if len(rows) > self.per_page:
+                break
+        return rows
+
+    @staticmethod
+    def _ordered(queryset, direction):
+        if direction == NEXT:
+            return queryset.order_by('-pub_date', '-pk')
+        return queryset.order_by('pub_date', 'pk')
+
+    @staticmethod
+    def _seek(direction, pub_date, pk):
+        """
+        (pub_date, id) < (x, pk) без голого OR: отдельная граница
+        pub_date <= x даёт SQLite диапазон по индексу, иначе он
+        перебирает все старые строки до LIMIT.
+        """
+        if direction == NEXT:
+            return Q(pub_date__lte=pub_date) & (
+                Q(pub_date__lt=pub_date) | Q(pk__lt=pk)
+            )
+        return Q(pub_date__gte=pub_date) & (
+            Q(pub_date__gt=pub_date) | Q(pk__gt=pk)
+        )
+
+    def _make_page(self, rows, direction, has_cursor):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == NEXT:
+            return CursorPage(rows, self, has_more, has_cursor)
+        rows.reverse()
+        return CursorPage(rows, self, has_cursor, has_more)
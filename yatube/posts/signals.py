@@ -0,0 +1,314 @@
+import threading
+from contextlib import contextmanager
+
+from django.core.files.images import get_image_dimensions
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.storage import acquire, release
+from core.tasks import run_in_process
+
+from .cache import (FEED_TAG, author_tag, forget_post_card, group_tag,
+                    invalidate_tags)
+from .models import (ArchivedPost, AuthorCounter, Comment, Follow, Group,
+                     Post, User)
+from .thumbnails import delete_variants, generate_thumbnails
+from .timeline import backfill_timeline, fan_out_post, forget_author
+
+CARD_USER_FIELDS = ('username', 'first_name', 'last_name')
+CARD_GROUP_FIELDS = ('slug', 'title')
+PAGE_GROUP_FIELDS = CARD_GROUP_FIELDS + ('description',)
+
+_state = threading.local()
+
+
+@contextmanager
+def keep_counters():
+    """Перенос постов в архив не меняет счётчики: пост остаётся на сайте."""
+    _state.moving = True
+    try:
+        yield
+    finally:
+        _state.moving = False
+
+
+def author_counter_defaults(author_id):
+    """Счётчики нового AuthorCounter: посты обоих уровней и подписчики."""
+    return {
+        'posts_count': sum(
+            model.objects.filter(author_id=author_id).count()
+            for model in (Post, ArchivedPost)
+        ),
+        'followers_count': Follow.objects.filter(author_id=author_id).count(),
+    }
+
+
+def change_author_count(author_id, delta):
+    counters = AuthorCounter.objects.filter(user_id=author_id)
+    if delta < 0:
+        counters = counters.filter(posts_count__gte=-delta)
+    updated = counters.update(posts_count=F('posts_count') + delta)
+    if not updated and delta > 0:
+        AuthorCounter.objects.get_or_create(
+            user_id=author_id, defaults=author_counter_defaults(author_id)
+        )
+
+
+def change_group_count(group_id, delta):
+    if group_id is None:
+        return
+    groups = Group.objects.filter(pk=group_id)
+    if delta < 0:
+        groups = groups.filter(posts_count__gte=-delta)
+    groups.update(posts_count=F('posts_count') + delta)
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_relations(sender, instance, raw, **kwargs):
+    instance._previous_relations = None
+    if raw or instance.pk is None:
+        return
+    row = (
+        Post.objects.filter(pk=instance.pk)
+        .values_list('author_id', 'group_id', 'image', 'version')
+        .first()
+    )
+    if row is None:
+        return
+    # Версию берём из базы: комментарии поднимают её через F(), и
+    # устаревший экземпляр записал бы номер уже закэшированной карточки.
+    *relations, version = row
+    instance.version = version + 1
+    instance._previous_relations = tuple(relations)
+
+
+@receiver(pre_save, sender=Post)
+def record_image_size(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    if not instance.image:
+        instance.image_width = instance.image_height = None
+        instance.image_bytes = None
+        instance.thumbnail_widths = ''
+    elif not instance.image._committed:
+        instance.image_width, instance.image_height = (
+            get_image_dimensions(instance.image)
+        )
+        instance.image_bytes = instance.image.size
+        instance.thumbnail_widths = ''
+
+
+def purge_pages(author_ids=(), group_ids=(), feed=True):
+    usernames = User.objects.filter(pk__in=author_ids).values_list(
+        'username', flat=True
+    )
+    slugs = Group.objects.filter(
+        pk__in=[pk for pk in group_ids if pk is not None]
+    ).values_list('slug', flat=True)
+    invalidate_tags(
+        *([FEED_TAG] if feed else []),
+        *(author_tag(username) for username in usernames),
+        *(group_tag(slug) for slug in slugs),
+    )
+
+
+@receiver(post_save, sender=Post)
+def update_counters_on_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_relations', None)
+    if created or previous is None:
+        change_author_count(instance.author_id, 1)
+        change_group_count(instance.group_id, 1)
+        purge_pages((instance.author_id,), (instance.group_id,))
+        return
+    author_id, group_id, image = previous
+    if author_id != instance.author_id:
+        change_author_count(author_id, -1)
+        change_author_count(instance.author_id, 1)
+    if group_id != instance.group_id:
+        change_group_count(group_id, -1)
+        change_group_count(instance.group_id, 1)
+    purge_pages(
+        (author_id, instance.author_id), (group_id, instance.group_id)
+    )
+
+
+@receiver(post_save, sender=Post)
+def schedule_thumbnails(sender, instance, created, raw, **kwargs):
+    if raw or not instance.image:
+        return
+    previous = getattr(instance, '_previous_relations', None)
+    if previous is not None and previous[2] == instance.image.name:
+        return
+    run_in_process(generate_thumbnails, instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+def track_image_refs(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_relations', None)
+    old = previous[2] if previous is not None else ''
+    new = instance.image.name or ''
+    if old == new:
+        return
+    if new:
+        acquire(new)
+    if old:
+        release(old, instance.image.storage, delete_variants)
+
+
+@receiver(post_save, sender=Post)
+def schedule_fan_out(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        run_in_process(fan_out_post, instance.pk)
+
+
+def change_followers_count(author_id, delta):
+    counters = AuthorCounter.objects.filter(user_id=author_id)
+    if delta < 0:
+        counters = counters.filter(followers_count__gte=-delta)
+    updated = counters.update(followers_count=F('followers_count') + delta)
+    if not updated and delta > 0:
+        AuthorCounter.objects.get_or_create(
+            user_id=author_id, defaults=author_counter_defaults(author_id)
+        )
+
+
+@receiver(post_save, sender=Follow)
+def start_following(sender, instance, created, raw, **kwargs):
+    if not created or raw:
+        return
+    change_followers_count(instance.author_id, 1)
+    run_in_process(backfill_timeline, instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def stop_following(sender, instance, **kwargs):
+    change_followers_count(instance.author_id, -1)
+    forget_author(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ArchivedPost)
+def update_counters_on_delete(sender, instance, **kwargs):
+    if getattr(_state, 'moving', False):
+        return
+    change_author_count(instance.author_id, -1)
+    change_group_count(instance.group_id, -1)
+    forget_post_card(instance)
+    purge_pages((instance.author_id,), (instance.group_id,))
+    Comment.objects.filter(post_id=instance.pk).delete()
+    if instance.image:
+        release(
+            instance.image.name, instance.image.storage, delete_variants
+        )
+
+
+def change_comments_count(post_id, delta):
+    """
+    Меняет счётчик комментариев поста в любом из уровней и версию
+    карточки, чтобы ленты показали новое число без COUNT.
+    """
+    for model in (Post, ArchivedPost):
+        posts = model.objects.filter(pk=post_id)
+        relations = posts.values_list('author_id', 'group_id').first()
+        if relations is None:
+            continue
+        if delta < 0:
+            posts = posts.filter(comments_count__gte=-delta)
+        posts.update(
+            comments_count=F('comments_count') + delta,
+            version=F('version') + 1,
+            updated_at=timezone.now(),
+        )
+        author_id, group_id = relations
+        purge_pages((author_id,), (group_id,))
+        return
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        change_comments_count(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    change_comments_count(instance.post_id, -1)
+
+
+def previous_values(instance, fields):
+    if instance.pk is None:
+        return None
+    return (
+        type(instance).objects.filter(pk=instance.pk)
+        .values_list(*fields).first()
+    )
+
+
+def current_values(instance, fields):
+    return tuple(getattr(instance, field) for field in fields)
+
+
+@receiver(pre_save, sender=User)
+def remember_author_fields(sender, instance, raw, update_fields, **kwargs):
+    instance._previous_fields = None
+    if raw or update_fields is not None and not (
+        set(update_fields) & set(CARD_USER_FIELDS)
+    ):
+        return
+    instance._previous_fields = previous_values(instance, CARD_USER_FIELDS)
+
+
+@receiver(pre_save, sender=Group)
+def remember_group_fields(sender, instance, raw, **kwargs):
+    instance._previous_fields = None
+    if not raw:
+        instance._previous_fields = previous_values(
+            instance, PAGE_GROUP_FIELDS
+        )
+
+
+@receiver(post_save, sender=User)
+def refresh_author_posts(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_fields', None)
+    if previous is None or previous == current_values(
+        instance, CARD_USER_FIELDS
+    ):
+        return
+    group_ids = set()
+    for model in (Post, ArchivedPost):
+        posts = model.objects.filter(author=instance)
+        posts.update(version=F('version') + 1, updated_at=timezone.now())
+        group_ids.update(
+            posts.order_by().values_list('group_id', flat=True)
+        )
+    purge_pages(group_ids=group_ids)
+    invalidate_tags(author_tag(previous[0]), author_tag(instance.username))
+
+
+@receiver(post_save, sender=Group)
+def refresh_group_posts(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_fields', None)
+    if previous is None or previous == current_values(
+        instance, PAGE_GROUP_FIELDS
+    ):
+        return
+    card_fields = len(CARD_GROUP_FIELDS)
+    card_changed = previous[:card_fields] != current_values(
+        instance, CARD_GROUP_FIELDS
+    )
+    if card_changed:
+        for model in (Post, ArchivedPost):
+            model.objects.filter(group=instance).update(
+                version=F('version') + 1, updated_at=timezone.now()
+            )
+    invalidate_tags(
+        *([FEED_TAG] if card_changed else []),
+        group_tag(previous[0]),
+        group_tag(instance.slug),
+    )
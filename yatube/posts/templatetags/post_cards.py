@@ -0,0 +1,10 @@
+from django import template
+
+from posts.cache import render_post_cards
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts):
+    return render_post_cards(posts, context.get('group'))
@@ -0,0 +1,53 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+from ..thumbnails import variant_height, variant_name
+
+register = template.Library()
+
+DEFAULT_SIZES = '(max-width: 960px) 100vw, 960px'
+
+
+def srcset(name, widths, extension):
+    return ', '.join(
+        f'{default_storage.url(variant_name(name, width, extension))} {width}w'
+        for width in widths
+    )
+
+
+@register.simple_tag
+def responsive_image(post, sizes=DEFAULT_SIZES, css_class='card-img my-2'):
+    """
+    <picture> с WebP и JPEG srcset из уже построенного набора
+    post.thumbnail_widths: адреса собираются строками, без обращений
+    к хранилищу. Пока набор не готов, отдаётся исходная картинка.
+    """
+    if not post.image:
+        return ''
+    widths = [
+        int(width) for width in post.thumbnail_widths.split(',') if width
+    ]
+    if not widths:
+        return format_html(
+            '<img class="{}" src="{}" loading="lazy" decoding="async" '
+            'alt="">',
+            css_class, post.image.url,
+        )
+    name = post.image.name
+    fallback = widths[-1]
+    return format_html(
+        '<picture>{}<img class="{}" src="{}" srcset="{}" sizes="{}" '
+        'width="{}" height="{}" loading="lazy" decoding="async" alt="">'
+        '</picture>',
+        format_html_join(
+            '', '<source type="image/webp" srcset="{}" sizes="{}">',
+            [(srcset(name, widths, 'webp'), sizes)],
+        ),
+        css_class,
+        default_storage.url(variant_name(name, fallback, 'jpg')),
+        srcset(name, widths, 'jpg'),
+        sizes,
+        fallback,
+        variant_height(fallback),
+    )
@@ -0,0 +1,129 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..archive import TieredPosts
+from ..models import ArchivedPost, Follow, Group, Post
+
+User = get_user_model()
+
+
+class BulkImportTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(content)
+        return path
+
+    def test_jsonl_import_with_counters_and_dates(self):
+        """JSONL импортируется пачками, с pub_date и счётчиками."""
+        records = (
+            {'type': 'user', 'username': 'importer'},
+            {'type': 'group', 'slug': 'imported', 'title': 'Группа'},
+            {'type': 'post', 'author': 'importer', 'group': 'imported',
+             'text': 'Старый пост', 'pub_date': '2020-01-02T03:04:05+00:00'},
+            {'type': 'post', 'author': 'importer', 'text': 'Новый пост'},
+        )
+        path = self.write(
+            'content.jsonl', '\n'.join(json.dumps(item) for item in records)
+        )
+        call_command('bulk_import', path, chunk_size=2, stdout=StringIO())
+        user = User.objects.get(username='importer')
+        group = Group.objects.get(slug='imported')
+        self.assertEqual(user.post_counter.posts_count, 2)
+        self.assertEqual(group.posts_count, 1)
+        self.assertEqual(
+            ArchivedPost.objects.get(text='Старый пост').pub_date.year, 2020
+        )
+
+    def test_csv_import_resumes_from_offset(self):
+        """После ошибки импорт продолжается с указанного offset."""
+        User.objects.create(username='csv')
+        path = self.write(
+            'posts.csv',
+            'author,text\ncsv,Первый\ncsv,Второй\n'
+            'nobody,Третий\ncsv,Четвёртый\n'
+        )
+        with self.assertRaisesMessage(CommandError, '--offset 2'):
+            call_command(
+                'bulk_import', path, kind='post', chunk_size=2,
+                stdout=StringIO(),
+            )
+        self.assertEqual(Post.objects.count(), 2)
+        call_command(
+            'bulk_import', path, kind='post', offset=3, stdout=StringIO()
+        )
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('text', flat=True)),
+            ['Первый', 'Второй', 'Четвёртый'],
+        )
+
+    def test_database_error_reports_resume_offset(self):
+        """Ошибка базы тоже сообщает, с какого offset продолжить."""
+        User.objects.create(username='broken')
+        records = (
+            {'type': 'post', 'author': 'broken', 'text': 'Первый'},
+            {'type': 'post', 'author': 'broken', 'text': 'Второй'},
+            {'type': 'post', 'author': 'broken', 'text': None},
+        )
+        path = self.write(
+            'broken.jsonl', '\n'.join(json.dumps(item) for item in records)
+        )
+        with self.assertRaisesMessage(CommandError, '--offset 2'):
+            call_command(
+                'bulk_import', path, chunk_size=2, stdout=StringIO()
+            )
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertTrue(Post._meta.get_field('pub_date').auto_now_add)
+
+    def test_imported_posts_reach_follower_timeline(self):
+        """Горячие импортированные посты попадают в ленты подписчиков."""
+        author = User.objects.create(username='followed')
+        reader = User.objects.create(username='reader')
+        Follow.objects.create(user=reader, author=author)
+        records = (
+            {'type': 'post', 'author': 'followed', 'text': 'Древний',
+             'pub_date': '2019-05-01T00:00:00+00:00'},
+            {'type': 'post', 'author': 'followed', 'text': 'Свежий'},
+        )
+        path = self.write(
+            'feed.jsonl', '\n'.join(json.dumps(item) for item in records)
+        )
+        call_command('bulk_import', path, stdout=StringIO())
+        self.assertEqual(
+            list(reader.timeline.values_list('post__text', flat=True)),
+            ['Свежий'],
+        )
+
+    def test_old_posts_go_to_archive_in_order(self):
+        """Посты старше горячих ложатся в архив, порядок ярусов не ломается."""
+        user = User.objects.create(username='tiered')
+        Post.objects.create(author=user, text='Горячий')
+        records = (
+            {'type': 'post', 'author': 'tiered', 'text': 'Древний',
+             'pub_date': '2019-05-01T00:00:00+00:00'},
+            {'type': 'post', 'author': 'tiered', 'text': 'Свежий'},
+        )
+        path = self.write(
+            'tiered.jsonl', '\n'.join(json.dumps(item) for item in records)
+        )
+        call_command('bulk_import', path, stdout=StringIO())
+        tiered = TieredPosts(
+            user.posts.order_by('-pub_date', '-id'),
+            user.archived_posts.order_by('-pub_date', '-id'),
+        )
+        self.assertEqual(
+            [post.text for post in tiered[:3]],
+            ['Свежий', 'Горячий', 'Древний'],
+        )
+        self.assertEqual(user.post_counter.posts_count, 3)
@@ -0,0 +1,106 @@
+import json
+from xml.etree import ElementTree
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='feeder')
+        cls.group = Group.objects.create(
+            title='Группа ленты',
+            slug='feed-slug',
+            description='Тестовое описание группы'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Пост <для> ленты & агрегаторов',
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def feed_urls(self, fmt):
+        return (
+            reverse('posts:index_feed', kwargs={'fmt': fmt}),
+            reverse('posts:group_feed',
+                    kwargs={'fmt': fmt, 'slug': self.group.slug}),
+            reverse('posts:profile_feed',
+                    kwargs={'fmt': fmt, 'username': self.user.username}),
+        )
+
+    def test_feeds_are_streamed_and_valid(self):
+        """RSS, Atom и JSON отдаются потоком и разбираются парсером."""
+        for fmt in ('rss', 'atom'):
+            for url in self.feed_urls(fmt):
+                with self.subTest(url=url):
+                    response = self.guest_client.get(url)
+                    self.assertTrue(response.streaming)
+                    root = ElementTree.fromstring(
+                        b''.join(response.streaming_content)
+                    )
+                    self.assertIn(self.post.text, ElementTree.tostring(
+                        root, encoding='unicode', method='text'
+                    ))
+        for url in self.feed_urls('json'):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                feed = json.loads(b''.join(response.streaming_content))
+                self.assertEqual(
+                    feed['items'][0]['content_text'], self.post.text
+                )
+
+    def test_conditional_get_returns_not_modified(self):
+        """Повторный опрос с ETag получает 304, пока лента не изменилась."""
+        url = reverse('posts:index_feed', kwargs={'fmt': 'rss'})
+        etag = self.guest_client.get(url)['ETag']
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(author=self.user, text='Свежий пост')
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_unknown_group_feed_is_not_found(self):
+        """Лента несуществующей группы отдаёт 404."""
+        response = self.guest_client.get(
+            reverse('posts:group_feed', kwargs={'fmt': 'rss', 'slug': 'nope'})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_feeds_are_well_formed_xml(self):
+        """Управляющие символы вырезаются, автор RSS - в dc:creator."""
+        Post.objects.create(author=self.user, text='Строка\x0bс\x00мусором')
+        url = reverse('posts:index_feed', kwargs={'fmt': 'rss'})
+        root = ElementTree.fromstring(
+            b''.join(self.guest_client.get(url).streaming_content)
+        )
+        creator = '{http://purl.org/dc/elements/1.1/}creator'
+        self.assertEqual(root.find(f'.//item/{creator}').text, 'feeder')
+        self.assertIsNone(root.find('.//item/author'))
+        self.assertIn('Строкасмусором', ElementTree.tostring(
+            root, encoding='unicode', method='text'
+        ))
+
+    def test_empty_atom_feed_has_updated(self):
+        """Пустая Atom-лента всё равно содержит обязательный updated."""
+        empty = Group.objects.create(title='Пустая', slug='empty')
+        url = reverse(
+            'posts:group_feed', kwargs={'fmt': 'atom', 'slug': empty.slug}
+        )
+        root = ElementTree.fromstring(
+            b''.join(self.guest_client.get(url).streaming_content)
+        )
+        self.assertIsNotNone(
+            root.find('{http://www.w3.org/2005/Atom}updated')
+        )
@@ -1,11 +1,28 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models import F
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
 from posts.forms import PostForm
-from posts.models import Group, Post
+from posts.models import Comment, Group, Post
 
 User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(name, size, mode='RGB', image_format='PNG'):
+    buffer = BytesIO()
+    Image.new(mode, size, 'red').save(buffer, image_format)
+    return SimpleUploadedFile(
+        name, buffer.getvalue(), content_type=f'image/{image_format.lower()}'
+    )
 
 
 class PostCreateFormTests(TestCase):
@@ -94,6 +111,25 @@ class PostCreateFormTests(TestCase):
             'Название группы для теста'
         )
 
+    def test_post_edit_keeps_concurrent_counters(self):
+        """Правка не затирает счётчики, изменённые после чтения поста."""
+        stale = Post.objects.get(pk=self.post.pk)
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий'
+        )
+        Post.objects.filter(pk=self.post.pk).update(views=F('views') + 7)
+        with mock.patch(
+            'posts.views.get_object_or_404', return_value=stale
+        ):
+            self.authorized_client.post(
+                reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+                data={'text': 'Правка поверх счётчиков'},
+            )
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.text, 'Правка поверх счётчиков')
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(post.views, 7)
+
     def test_form_post_edit_post_by_anonym(self):
         """
         Редактирование под анонимом (пост не должен изменить значения полей).
@@ -141,3 +177,84 @@ class PostCreateFormTests(TestCase):
         edited_post = Post.objects.get(id=self.post.id)
         self.assertNotEqual(edited_post.text, form_data['text'])
         self.assertNotEqual(edited_post.group.id, form_data['group'])
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT, TASKS_EAGER=True, IMAGE_MAX_SIZE=400
+)
+class PostImageUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='photographer')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_upload_is_resized_and_measured(self):
+        """Картинка уменьшается при загрузке, размеры пишутся в пост."""
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'Пост с картинкой',
+                'image': make_image('big.png', (1200, 600)),
+            },
+        )
+        post = Post.objects.get(text='Пост с картинкой')
+        self.assertTrue(post.image.name.endswith('.jpg'))
+        self.assertEqual((post.image_width, post.image_height), (400, 200))
+        self.assertEqual(post.image_bytes, post.image.size)
+
+    def test_transparent_upload_stays_png(self):
+        """Картинка с прозрачностью сохраняется в PNG."""
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'Прозрачный пост',
+                'image': make_image('alpha.png', (100, 50), mode='RGBA'),
+            },
+        )
+        post = Post.objects.get(text='Прозрачный пост')
+        self.assertTrue(post.image.name.endswith('.png'))
+        self.assertEqual((post.image_width, post.image_height), (100, 50))
+
+    @override_settings(MAX_UPLOAD_SIZE=100)
+    def test_too_large_upload_is_rejected(self):
+        """Файл больше MAX_UPLOAD_SIZE не принимается."""
+        response = self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'Слишком большой',
+                'image': make_image('big.png', (300, 300)),
+            },
+        )
+        self.assertFormError(
+            response, 'form', 'image', 'Файл больше 100\xa0байт.'
+        )
+        self.assertFalse(Post.objects.filter(text='Слишком большой'))
+
+    def test_truncated_upload_is_rejected(self):
+        """Обрезанный JPEG отклоняется формой, а не роняет сервер."""
+        image = make_image('photo.jpg', (400, 400), image_format='JPEG')
+        data = image.read()
+        response = self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'Обрезанный',
+                'image': SimpleUploadedFile(
+                    'photo.jpg', data[:len(data) // 2],
+                    content_type='image/jpeg',
+                ),
+            },
+        )
+        self.assertFormError(
+            response, 'form', 'image',
+            'Файл повреждён или слишком велик для обработки.'
+        )
+        self.assertFalse(Post.objects.filter(text='Обрезанный'))
@@ -1,10 +1,33 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.core.files.storage import default_storage
+from django.template import Context, Template
+from django.utils import timezone
+from PIL import Image
 
-from ..models import Group, Post
+from ..archive import archive_posts
+from ..models import AuthorCounter, Comment, Follow, Group, Post
+from ..thumbnails import variant_height, variant_name
 
 User = get_user_model()
 
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
 
 class PostModelTest(TestCase):
     @classmethod
@@ -38,3 +61,157 @@ class GroupModelTest(TestCase):
         group = GroupModelTest.group
         expected_object_name = group.title
         self.assertEqual(expected_object_name, str(group))
+
+
+class PostCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='counter')
+        cls.group = Group.objects.create(
+            title='Группа со счётчиком',
+            slug='counter-group',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-group',
+            description='Тестовое описание',
+        )
+
+    def assertCounts(self, author, group, other_group):
+        self.user.post_counter.refresh_from_db()
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.user.post_counter.posts_count, author)
+        self.assertEqual(self.group.posts_count, group)
+        self.assertEqual(self.other_group.posts_count, other_group)
+
+    def test_counters_follow_create_move_and_delete(self):
+        """Счётчики меняются при создании, смене группы и удалении поста."""
+        post = Post.objects.create(
+            author=self.user, text='Пост', group=self.group
+        )
+        Post.objects.create(author=self.user, text='Пост без группы')
+        self.assertCounts(author=2, group=1, other_group=0)
+        post.group = self.other_group
+        post.save()
+        self.assertCounts(author=2, group=0, other_group=1)
+        post.delete()
+        self.assertCounts(author=1, group=0, other_group=0)
+
+    def test_reconcile_counters_fixes_drift(self):
+        """reconcile_counters восстанавливает разъехавшиеся счётчики."""
+        Post.objects.create(author=self.user, text='Пост', group=self.group)
+        Group.objects.filter(pk=self.group.pk).update(posts_count=7)
+        AuthorCounter.objects.filter(user=self.user).delete()
+        call_command('reconcile_counters', batch_size=1, stdout=StringIO())
+        self.user = User.objects.get(pk=self.user.pk)
+        self.assertCounts(author=1, group=1, other_group=0)
+
+    def test_reconcile_counters_fixes_followers(self):
+        """reconcile_counters сверяет и число подписчиков."""
+        reader = User.objects.create(username='reader')
+        Follow.objects.create(user=reader, author=self.user)
+        AuthorCounter.objects.filter(user=self.user).update(
+            followers_count=9
+        )
+        Follow.objects.create(user=self.user, author=reader)
+        AuthorCounter.objects.filter(user=reader).delete()
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertEqual(
+            AuthorCounter.objects.get(user=self.user).followers_count, 1
+        )
+        self.assertEqual(
+            AuthorCounter.objects.get(user=reader).followers_count, 1
+        )
+
+    def test_missing_counter_is_seeded_from_both_tiers(self):
+        """Новый счётчик автора учитывает архив и подписчиков."""
+        author = User.objects.create(username='seeded')
+        Post.objects.create(author=author, text='Старый пост')
+        list(archive_posts(timezone.now() + timedelta(days=1), 10))
+        Follow.objects.create(user=self.user, author=author)
+        AuthorCounter.objects.filter(user=author).delete()
+        Post.objects.create(author=author, text='Новый пост')
+        counter = AuthorCounter.objects.get(user=author)
+        self.assertEqual(counter.posts_count, 2)
+        self.assertEqual(counter.followers_count, 1)
+
+    def test_comments_counter_and_card_version(self):
+        """Комментарий меняет счётчик и версию карточки поста."""
+        post = Post.objects.create(author=self.user, text='Пост')
+        comment = Comment.objects.create(
+            post=post, author=self.user, text='Комментарий'
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(post.version, 2)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        Comment.objects.create(post=post, author=self.user, text='Ещё')
+        Post.objects.filter(pk=post.pk).update(comments_count=5)
+        call_command('reconcile_counters', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        post.delete()
+        self.assertFalse(Comment.objects.filter(post_id=post.pk).exists())
+
+    def test_stale_instance_save_bumps_stored_version(self):
+        """Сохранение устаревшего экземпляра поднимает версию из базы."""
+        post = Post.objects.create(author=self.user, text='Пост')
+        Comment.objects.create(post=post, author=self.user, text='Первый')
+        Comment.objects.create(post=post, author=self.user, text='Второй')
+        post.text = 'Правка'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.version, 4)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), TASKS_EAGER=True)
+class ThumbnailPipelineTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_thumbnails_are_built_when_image_is_saved(self):
+        """Набор миниатюр строится при сохранении картинки."""
+        user = User.objects.create(username='painter')
+        buffer = BytesIO()
+        Image.new('RGB', (700, 400), 'blue').save(buffer, 'PNG')
+        post = Post.objects.create(
+            author=user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                'wide.png', buffer.getvalue(), content_type='image/png'
+            ),
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnail_widths, '320,640')
+        for width in (320, 640):
+            for extension in ('webp', 'jpg'):
+                with self.subTest(width=width, extension=extension):
+                    name = variant_name(post.image.name, width, extension)
+                    with default_storage.open(name) as file:
+                        self.assertEqual(
+                            Image.open(file).size,
+                            (width, variant_height(width)),
+                        )
+
+    def test_responsive_image_tag(self):
+        """Тег отдаёт srcset из готового набора, иначе исходную картинку."""
+        post = Post(image='posts/picture.jpg', thumbnail_widths='320,640')
+        template = Template(
+            '{% load post_images %}{% responsive_image post %}'
+        )
+        html = template.render(Context({'post': post}))
+        self.assertIn('type="image/webp"', html)
+        self.assertIn('thumbs/posts/picture/320.webp 320w', html)
+        self.assertIn('thumbs/posts/picture/640.jpg 640w', html)
+        self.assertIn('loading="lazy"', html)
+        post.thumbnail_widths = ''
+        html = template.render(Context({'post': post}))
+        self.assertIn('src="/media/posts/picture.jpg"', html)
+        self.assertNotIn('srcset', html)
@@ -1,9 +1,30 @@
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from datetime import timedelta
+from unittest import mock
+
 from django import forms
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
 from django.urls import reverse
+from django.utils import timezone
 
-from posts.models import Group, Post
+from core.metrics import registry
+from core.testing import QueryBudgetMixin
+from posts.archive import archive_posts
+from posts.cache import FEED_TAG, post_card_key
+from posts.hits import ViewBuffer, recover_journals, views_buffer
+from posts.models import (ArchivedPost, Comment, Follow, Group, Post,
+                          TimelineEntry, author_posts_count)
+from posts.paginators import (NEXT, PREVIOUS, CachedCountPaginator,
+                              CursorPaginator)
 
 User = get_user_model()
 
@@ -30,6 +51,7 @@ class TaskPagesTests(TestCase):
         )
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
@@ -97,6 +119,7 @@ class TaskPagesTests(TestCase):
         form_fields = {
             'text': forms.fields.CharField,
             'group': forms.fields.ChoiceField,
+            'image': forms.fields.ImageField,
         }
         for value, expected in form_fields.items():
             with self.subTest(value=value):
@@ -110,6 +133,7 @@ class TaskPagesTests(TestCase):
         form_fields = {
             'text': forms.fields.CharField,
             'group': forms.fields.ChoiceField,
+            'image': forms.fields.ImageField,
         }
         for value, expected in form_fields.items():
             with self.subTest(value=value):
@@ -142,3 +166,697 @@ class TaskPagesTests(TestCase):
             kwargs={'slug': self.group_wihtout_posts.slug}))
         posts = response.context['page_obj']
         self.assertEqual(0, len(posts))
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='cursor')
+        cls.group = Group.objects.create(
+            title='Группа для курсоров',
+            slug='cursor-slug',
+            description='Тестовое описание группы'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user,
+                text=f'Пост номер {number}',
+                group=cls.group,
+            )
+            for number in range(settings.COUNT_POST + 3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_cursor_pages_walk_whole_feed(self):
+        """Курсоры next/prev обходят ленту без пропусков и повторов."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                first = self.guest_client.get(url, {'cursor': ''})
+                page = first.context['page_obj']
+                self.assertEqual(len(page), settings.COUNT_POST)
+                self.assertFalse(page.has_previous())
+                second = self.guest_client.get(
+                    url, {'cursor': page.next_cursor()}
+                )
+                next_page = second.context['page_obj']
+                self.assertEqual(len(next_page), 3)
+                self.assertFalse(next_page.has_next())
+                seen = [post.pk for post in page] + [
+                    post.pk for post in next_page
+                ]
+                self.assertEqual(
+                    seen, [post.pk for post in reversed(self.posts)]
+                )
+                back = self.guest_client.get(
+                    url, {'cursor': next_page.previous_cursor()}
+                )
+                self.assertEqual(
+                    [post.pk for post in back.context['page_obj']],
+                    [post.pk for post in page],
+                )
+
+    def test_seek_uses_index_range(self):
+        """Условие курсора - диапазон по индексу без сортировки в памяти."""
+        post = self.posts[5]
+        for direction in (NEXT, PREVIOUS):
+            with self.subTest(direction=direction):
+                queryset = CursorPaginator._ordered(
+                    Post.objects.all(), direction
+                ).filter(
+                    CursorPaginator._seek(direction, post.pub_date, post.pk)
+                )[:settings.COUNT_POST + 1]
+                sql, params = queryset.query.sql_with_params()
+                with connection.cursor() as cursor:
+                    cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                    plan = ' '.join(row[-1] for row in cursor.fetchall())
+                self.assertIn('SEARCH', plan)
+                self.assertIn('pub_dat', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_broken_cursor_returns_first_page(self):
+        """Битый курсор отдаёт первую страницу."""
+        response = self.guest_client.get(
+            reverse('posts:index'), {'cursor': 'не-курсор'}
+        )
+        self.assertEqual(
+            response.context['page_obj'][0].pk, self.posts[-1].pk
+        )
+
+
+@override_settings(PAGE_CACHE=True)
+class CachedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='counted')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост номер {number}')
+            for number in range(3)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_page_range_is_elided(self):
+        """Длинный список страниц сжимается до окна вокруг текущей."""
+        paginator = CachedCountPaginator(range(200), 1)
+        ellipsis = paginator.ELLIPSIS
+        self.assertEqual(
+            paginator.page(100).elided_page_range,
+            [1, 2, ellipsis, 97, 98, 99, 100, 101, 102, 103, ellipsis,
+             199, 200],
+        )
+        self.assertEqual(
+            paginator.page(2).elided_page_range,
+            [1, 2, 3, 4, 5, ellipsis, 199, 200],
+        )
+        self.assertEqual(
+            CachedCountPaginator(range(5), 1).page(3).elided_page_range,
+            [1, 2, 3, 4, 5],
+        )
+
+    def test_count_is_cached_until_new_post(self):
+        """COUNT(*) считается один раз и сбрасывается новым постом."""
+        def count():
+            return CachedCountPaginator(
+                Post.objects.all(), settings.COUNT_POST, [FEED_TAG]
+            ).count
+
+        with self.assertNumQueries(2):
+            self.assertEqual(count(), 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(count(), 3)
+        Post.objects.create(author=self.user, text='Новый пост')
+        self.assertEqual(count(), 4)
+
+    @override_settings(PAGE_COUNT_ESTIMATE_ABOVE=1000)
+    def test_large_table_uses_estimate(self):
+        """Большая таблица целиком берёт число строк из статистики."""
+        with mock.patch(
+            'posts.paginators.estimated_rows', return_value=5000
+        ):
+            everything = CachedCountPaginator(
+                Post.objects.all(), settings.COUNT_POST, [FEED_TAG]
+            )
+            filtered = CachedCountPaginator(
+                Post.objects.filter(author=self.user),
+                settings.COUNT_POST,
+                ['author:counted'],
+            )
+            self.assertEqual(everything.count, 5000)
+            self.assertEqual(filtered.count, 3)
+
+
+class ArchiveTierTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='archivist')
+        cls.group = Group.objects.create(
+            title='Группа с архивом',
+            slug='archive-slug',
+            description='Тестовое описание группы'
+        )
+        now = timezone.now()
+        cls.pks = []
+        for number in range(settings.COUNT_POST + 5):
+            post = Post.objects.create(
+                author=cls.user, text=f'Пост {number}', group=cls.group
+            )
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=now - timedelta(days=100 - number)
+            )
+            cls.pks.insert(0, post.pk)
+        cutoff = now - timedelta(days=100 - 8)
+        cls.moved = list(archive_posts(cutoff, batch_size=3))[-1]
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+
+    def test_old_posts_moved_without_touching_counters(self):
+        """Старые посты переехали в архив, счётчики не изменились."""
+        self.assertEqual(self.moved, 8)
+        self.assertEqual(ArchivedPost.objects.count(), 8)
+        self.assertFalse(Post.objects.filter(pk__in=self.pks[-8:]).exists())
+        self.user.refresh_from_db()
+        self.assertEqual(author_posts_count(self.user), len(self.pks))
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, len(self.pks))
+
+    def test_pages_span_both_tiers(self):
+        """Профиль и группа листаются через горячие и архивные посты."""
+        urls = (
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        for url in urls:
+            with self.subTest(url=url, paginator='page'):
+                seen = []
+                for number in (1, 2):
+                    response = self.guest_client.get(url, {'page': number})
+                    seen += [post.pk for post in response.context['page_obj']]
+                self.assertEqual(seen, self.pks)
+            with self.subTest(url=url, paginator='cursor'):
+                first = self.guest_client.get(url, {'cursor': ''})
+                page = first.context['page_obj']
+                second = self.guest_client.get(
+                    url, {'cursor': page.next_cursor()}
+                )
+                next_page = second.context['page_obj']
+                self.assertEqual(
+                    [post.pk for post in page]
+                    + [post.pk for post in next_page],
+                    self.pks,
+                )
+                back = self.guest_client.get(
+                    url, {'cursor': next_page.previous_cursor()}
+                )
+                self.assertEqual(
+                    [post.pk for post in back.context['page_obj']],
+                    [post.pk for post in page],
+                )
+
+    def test_index_shows_only_hot_posts(self):
+        """Главная показывает только горячие посты."""
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(
+            response.context['page_obj'].paginator.count, len(self.pks) - 8
+        )
+
+    def test_post_detail_resolves_archived_id(self):
+        """Архивный пост открывается по старому id без кнопки правки."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.pks[-1]})
+        response = self.author_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['is_archived'])
+        self.assertNotContains(response, 'редактировать запись')
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='validator')
+        cls.group = Group.objects.create(
+            title='Группа валидаторов',
+            slug='validator-slug',
+            description='Тестовое описание группы'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Исходный текст', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+
+    def assertRevalidates(self, url, change):
+        first = self.guest_client.get(url)
+        self.assertIn('Last-Modified', first)
+        not_modified = self.guest_client.get(
+            url, HTTP_IF_NONE_MATCH=first['ETag']
+        )
+        self.assertEqual(not_modified.status_code, 304)
+        change()
+        modified = self.guest_client.get(
+            url, HTTP_IF_NONE_MATCH=first['ETag']
+        )
+        self.assertEqual(modified.status_code, 200)
+        self.assertNotEqual(modified['ETag'], first['ETag'])
+
+    def test_post_detail_revalidates_after_edit(self):
+        """post_edit двигает updated_at и меняет ETag страницы поста."""
+        post = Post.objects.get(pk=self.post.pk)
+        url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+
+        def edit():
+            self.author_client.post(
+                reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+                {'text': 'Новый текст', 'group': self.group.pk},
+            )
+
+        self.assertRevalidates(url, edit)
+        self.assertGreater(
+            Post.objects.get(pk=post.pk).updated_at, post.updated_at
+        )
+
+    def test_listings_revalidate_after_new_post(self):
+        """Новый пост меняет ETag главной, группы и профиля."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertRevalidates(url, lambda: Post.objects.create(
+                    author=self.user, text='Ещё пост', group=self.group
+                ))
+
+    def test_authorized_pages_have_no_validators(self):
+        """Авторизованным страницы отдаются без ETag."""
+        response = self.author_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertNotIn('ETag', response)
+
+
+@override_settings(TASKS_EAGER=True)
+class FollowTimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+        cls.other = User.objects.create_user(username='stranger')
+        cls.old_post = Post.objects.create(
+            author=cls.author, text='Пост до подписки'
+        )
+        Post.objects.create(author=cls.other, text='Чужой пост')
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def follow(self):
+        self.reader_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author}
+        ))
+
+    def feed(self):
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_follow_backfills_and_fans_out(self):
+        """Подписка заполняет ленту, новые посты автора попадают в неё."""
+        self.follow()
+        self.assertTrue(
+            Follow.objects.filter(user=self.reader, author=self.author)
+            .exists()
+        )
+        self.assertEqual(self.feed(), [self.old_post.pk])
+        new_post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertEqual(self.feed(), [new_post.pk, self.old_post.pk])
+
+    def test_unfollow_clears_timeline(self):
+        """После отписки посты автора из ленты пропадают."""
+        self.follow()
+        self.reader_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': self.author}
+        ))
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertEqual(self.feed(), [])
+        self.assertEqual(self.author.post_counter.followers_count, 0)
+
+    def test_cannot_follow_yourself(self):
+        """На себя подписаться нельзя."""
+        self.reader_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.reader}
+        ))
+        self.assertFalse(Follow.objects.filter(author=self.reader).exists())
+
+    @override_settings(FOLLOW_FANOUT_LIMIT=1)
+    def test_celebrity_posts_are_read_on_demand(self):
+        """Посты знаменитостей не раскладываются, но видны в ленте."""
+        self.follow()
+        new_post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertFalse(TimelineEntry.objects.filter(post=new_post))
+        self.assertEqual(self.feed(), [new_post.pk, self.old_post.pk])
+
+
+class PostViewCounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Просмотры из других тестов могли попасть на те же id.
+        views_buffer.flush()
+        cls.user = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.user, text='Читаемый пост')
+
+    def setUp(self):
+        self.journal_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.journal_dir)
+
+    def views(self):
+        return Post.objects.get(pk=self.post.pk).views
+
+    @override_settings(VIEW_FLUSH_INTERVAL=3600)
+    def test_views_are_buffered_until_flush(self):
+        """Просмотры копятся в памяти и пишутся в базу одним сбросом."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        for _ in range(3):
+            response = self.client.get(url)
+        self.assertEqual(response.context['views'], 3)
+        self.assertEqual(self.views(), 0)
+        with self.assertNumQueries(4):
+            views_buffer.flush()
+        self.assertEqual(self.views(), 3)
+
+    def journals(self):
+        return [
+            name for name in os.listdir(self.journal_dir)
+            if name.endswith('.log')
+        ]
+
+    def test_failed_flush_keeps_views_and_journal(self):
+        """Упавшая запись возвращает просмотры в буфер и не трогает журнал."""
+        with self.settings(VIEW_JOURNAL_DIR=self.journal_dir):
+            buffer = ViewBuffer()
+            buffer.hit(self.post.pk)
+            with mock.patch(
+                'posts.hits.apply_views', side_effect=DatabaseError
+            ):
+                with self.assertRaises(DatabaseError):
+                    buffer.flush()
+            self.assertEqual(len(self.journals()), 1)
+            buffer.hit(self.post.pk)
+            buffer.flush()
+        self.assertEqual(self.views(), 2)
+        self.assertEqual(self.journals(), [])
+
+    def test_dead_process_journal_is_recovered(self):
+        """Журнал процесса без flock на .lock досчитывается один раз."""
+        path = os.path.join(
+            self.journal_dir, f'views-{uuid.uuid4().hex}.1.log'
+        )
+        with open(path, 'w') as journal:
+            journal.write(f'{self.post.pk}\n' * 5)
+        self.assertEqual(recover_journals(self.journal_dir), 5)
+        self.assertEqual(recover_journals(self.journal_dir), 0)
+        self.assertEqual(self.views(), 5)
+        self.assertEqual(os.listdir(self.journal_dir), [])
+
+    def test_live_process_journal_is_left_alone(self):
+        """Журнал буфера, который держит flock, не забирается."""
+        with self.settings(VIEW_JOURNAL_DIR=self.journal_dir):
+            buffer = ViewBuffer()
+            buffer.hit(self.post.pk)
+            self.assertEqual(recover_journals(self.journal_dir), 0)
+            buffer.flush()
+        self.assertEqual(self.views(), 1)
+
+    def test_not_modified_view_is_counted(self):
+        """Повторный просмотр с ETag получает 304 и всё равно считается."""
+        views_buffer.flush()
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(views_buffer.pending(self.post.pk), 2)
+        views_buffer.flush()
+
+
+class ViewFlusherTests(TransactionTestCase):
+    @override_settings(VIEW_FLUSH_THREAD=True, VIEW_FLUSH_INTERVAL=0.05)
+    def test_idle_buffer_is_flushed_by_thread(self):
+        """Фоновый поток пишет просмотры и без новых запросов."""
+        user = User.objects.create_user(username='idle')
+        post = Post.objects.create(author=user, text='Тихий пост')
+        buffer = ViewBuffer()
+        buffer.hit(post.pk)
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            if Post.objects.get(pk=post.pk).views:
+                break
+            time.sleep(0.05)
+        self.assertEqual(Post.objects.get(pk=post.pk).views, 1)
+        self.assertEqual(buffer.pending(post.pk), 0)
+
+
+class CommentTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='commentator')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.url = reverse(
+            'posts:add_comment', kwargs={'post_id': self.post.pk}
+        )
+        self.detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+
+    def test_authorized_user_comments(self):
+        """Комментарий появляется на странице поста и в счётчике ленты."""
+        self.guest_client.get(reverse('posts:index'))
+        response = self.authorized_client.post(
+            self.url, {'text': 'Первый комментарий'}, follow=True
+        )
+        self.assertRedirects(response, self.detail_url)
+        comments = response.context['comments']
+        self.assertEqual([c.text for c in comments], ['Первый комментарий'])
+        index = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(index, 'Комментариев: 1')
+
+    def test_guest_cannot_comment(self):
+        """Аноним отправляется на страницу входа."""
+        response = self.guest_client.post(self.url, {'text': 'Спам'})
+        self.assertRedirects(
+            response, f'{reverse("users:login")}?next={self.url}'
+        )
+        self.assertFalse(Comment.objects.exists())
+
+    def test_comments_are_paginated(self):
+        """Комментарии показываются страницами по COMMENTS_PER_PAGE."""
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.user, text=f'Номер {number}')
+            for number in range(settings.COMMENTS_PER_PAGE + 2)
+        )
+        first = self.guest_client.get(self.detail_url)
+        self.assertEqual(
+            len(first.context['comments']), settings.COMMENTS_PER_PAGE
+        )
+        second = self.guest_client.get(self.detail_url, {'page': 2})
+        self.assertEqual(len(second.context['comments']), 2)
+
+    def test_archived_post_keeps_comments(self):
+        """Комментарии переезжают в архив вместе с постом."""
+        Comment.objects.create(post=self.post, author=self.user, text='Старый')
+        list(archive_posts(timezone.now(), batch_size=10))
+        response = self.authorized_client.get(self.detail_url)
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            ['Старый'],
+        )
+        self.assertEqual(response.context['post'].comments_count, 1)
+        self.assertNotContains(response, 'Добавить комментарий')
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='cards')
+        cls.group = Group.objects.create(
+            title='Группа карточек',
+            slug='cards-slug',
+            description='Тестовое описание группы'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Исходный текст',
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_card_is_served_from_cache(self):
+        """Карточка поста кладётся в кэш по id и версии поста."""
+        self.guest_client.get(reverse('posts:index'))
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertIsNotNone(cache.get(post_card_key(post)))
+
+    def test_card_changes_after_post_author_and_group_edit(self):
+        """Правка поста, автора или группы сбрасывает карточку."""
+        index = reverse('posts:index')
+        self.guest_client.get(index)
+        self.post.text = 'Новый текст'
+        self.post.save()
+        self.assertContains(self.guest_client.get(index), 'Новый текст')
+        self.user.first_name = 'Имя'
+        self.user.last_name = 'Фамилия'
+        self.user.save()
+        self.assertContains(self.guest_client.get(index), 'Имя Фамилия')
+        self.group.slug = 'new-cards-slug'
+        self.group.save()
+        self.assertContains(self.guest_client.get(index), 'new-cards-slug')
+
+
+@override_settings(PAGE_CACHE=True)
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='pages')
+        cls.group = Group.objects.create(
+            title='Группа страниц',
+            slug='pages-slug',
+            description='Тестовое описание группы'
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа страниц',
+            slug='other-pages-slug',
+            description='Тестовое описание группы'
+        )
+        Post.objects.create(author=cls.user, text='Пост', group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def is_cached(self, url):
+        return self.guest_client.get(url).context is None
+
+    def test_anonymous_pages_are_cached(self):
+        """Анонимам повторно отдаётся страница из кэша, авторам - нет."""
+        url = reverse('posts:index')
+        self.assertFalse(self.is_cached(url))
+        self.assertTrue(self.is_cached(url))
+        response = self.authorized_client.get(url)
+        self.assertIsNotNone(response.context)
+
+    @override_settings(PAGE_CACHE=False)
+    def test_pages_are_not_cached_without_shared_cache(self):
+        """Без общего кэша страницы рендерятся на каждый запрос."""
+        url = reverse('posts:index')
+        self.assertFalse(self.is_cached(url))
+        self.assertFalse(self.is_cached(url))
+
+    def test_post_write_purges_only_its_tags(self):
+        """Новый пост сбрасывает ленту, свою группу и автора."""
+        urls = {
+            reverse('posts:index'): False,
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}):
+                False,
+            reverse('posts:profile', kwargs={'username': self.user}): False,
+            reverse('posts:group_list',
+                    kwargs={'slug': self.other_group.slug}): True,
+        }
+        for url in urls:
+            self.guest_client.get(url)
+        Post.objects.create(author=self.user, text='Ещё', group=self.group)
+        for url, cached in urls.items():
+            with self.subTest(url=url):
+                self.assertEqual(self.is_cached(url), cached)
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='budget')
+        cls.group = Group.objects.create(
+            title='Группа бюджета',
+            slug='budget-slug',
+            description='Тестовое описание группы'
+        )
+        for number in range(settings.COUNT_POST + 5):
+            cls.post = Post.objects.create(
+                author=cls.user,
+                text=f'Пост {number}',
+                group=cls.group,
+            )
+        for number in range(3):
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Комментарий {number}'
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_views_stay_within_query_budget(self):
+        """Страницы не выходят за объявленный бюджет SQL-запросов."""
+        public_urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        private_urls = (
+            reverse('posts:post_create'),
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            reverse('posts:follow_index'),
+        )
+        for url in public_urls:
+            with self.subTest(url=url, client='guest'):
+                cache.clear()
+                self.assertWithinQueryBudget(self.guest_client, url)
+        for url in public_urls + private_urls:
+            with self.subTest(url=url, client='author'):
+                self.assertWithinQueryBudget(self.authorized_client, url)
+
+    def test_metrics_are_recorded_per_url_name(self):
+        """Middleware складывает метрики запроса в гистограммы по URL name."""
+        registry.reset()
+        self.guest_client.get(reverse('posts:index'))
+        metrics = registry.snapshot()['posts:index']
+        self.assertEqual(metrics['wall_ms']['count'], 1)
+        self.assertEqual(metrics['queries']['sum'], 4)
+        self.assertGreater(metrics['template_ms']['sum'], 0)
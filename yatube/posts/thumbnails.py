@@ -0,0 +1,87 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .models import ArchivedPost, Post
+
+FORMATS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpg', 'JPEG', {'optimize': True, 'progressive': True}),
+)
+
+
+def variant_name(name, width, extension):
+    stem = os.path.splitext(name)[0]
+    return f'thumbs/{stem}/{width}.{extension}'
+
+
+def delete_variants(name):
+    """Удаляет все миниатюры картинки; сам исходник не трогает."""
+    directory = os.path.dirname(variant_name(name, 0, ''))
+    try:
+        _, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for filename in files:
+        default_storage.delete(f'{directory}/{filename}')
+
+
+def variant_height(width):
+    ratio_width, ratio_height = settings.POST_IMAGE_ASPECT
+    return round(width * ratio_height / ratio_width)
+
+
+def variant_widths(source_width):
+    """Ширины не больше исходника; самая малая строится всегда."""
+    widths = [
+        width for width in settings.POST_IMAGE_WIDTHS if width <= source_width
+    ]
+    return widths or [min(settings.POST_IMAGE_WIDTHS)]
+
+
+def crop_to_aspect(image):
+    ratio_width, ratio_height = settings.POST_IMAGE_ASPECT
+    width = min(image.width, round(image.height * ratio_width / ratio_height))
+    height = min(image.height, round(width * ratio_height / ratio_width))
+    left = (image.width - width) // 2
+    top = (image.height - height) // 2
+    return image.crop((left, top, left + width, top + height))
+
+
+def generate_thumbnails(name):
+    """
+    Строит набор миниатюр картинки: все ширины POST_IMAGE_WIDTHS в WebP
+    и JPEG за одно декодирование исходника, каждая следующая ширина
+    уменьшается из предыдущей. Готовый набор записывается в
+    thumbnail_widths всех постов с этой картинкой.
+    """
+    storage = Post._meta.get_field('image').storage
+    largest = max(settings.POST_IMAGE_WIDTHS)
+    with storage.open(name) as source:
+        image = Image.open(source)
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image).convert('RGB')
+    frame = crop_to_aspect(image)
+    widths = variant_widths(frame.width)
+    for width in sorted(widths, reverse=True):
+        frame = frame.resize((width, variant_height(width)), Image.LANCZOS)
+        for extension, image_format, options in FORMATS:
+            target = variant_name(name, width, extension)
+            if default_storage.exists(target):
+                continue
+            if image_format == 'JPEG':
+                options = {**options, 'quality': settings.IMAGE_JPEG_QUALITY}
+            output = BytesIO()
+            frame.save(output, image_format, **options)
+            default_storage.save(target, ContentFile(output.getvalue()))
+    ready = ','.join(str(width) for width in sorted(widths))
+    for model in (Post, ArchivedPost):
+        model.objects.filter(image=name).update(
+            thumbnail_widths=ready, updated_at=timezone.now()
+        )
+    return name
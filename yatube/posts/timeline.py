@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.db.models import F, Q
+
+from .models import AuthorCounter, Follow, Post, TimelineEntry
+
+
+def is_celebrity(author_id):
+    """Авторам с числом подписчиков от FOLLOW_FANOUT_LIMIT ленты не пишем."""
+    return AuthorCounter.objects.filter(
+        user_id=author_id,
+        followers_count__gte=settings.FOLLOW_FANOUT_LIMIT,
+    ).exists()
+
+
+def write_entries(entries):
+    TimelineEntry.objects.bulk_create(
+        entries,
+        batch_size=settings.FANOUT_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def fan_out_post(post_id):
+    """Фоновая задача: раскладывает новый пост по лентам подписчиков."""
+    post = Post.objects.filter(pk=post_id).values(
+        'author_id', 'pub_date'
+    ).first()
+    if post is None or is_celebrity(post['author_id']):
+        return
+    followers = Follow.objects.filter(
+        author_id=post['author_id']
+    ).values_list('user_id', flat=True)
+    batch = []
+    for user_id in followers.iterator(chunk_size=settings.FANOUT_BATCH_SIZE):
+        batch.append(TimelineEntry(
+            user_id=user_id, post_id=post_id, **post
+        ))
+        if len(batch) >= settings.FANOUT_BATCH_SIZE:
+            write_entries(batch)
+            batch = []
+    write_entries(batch)
+
+
+def fan_out_posts(post_ids):
+    """Фоновая задача: раскладка пачки постов, например после импорта."""
+    for post_id in post_ids:
+        fan_out_post(post_id)
+
+
+def backfill_timeline(user_id, author_id):
+    """Фоновая задача: новый подписчик получает последние посты автора."""
+    if is_celebrity(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-pk'
+    ).values_list('pk', 'pub_date')[:settings.TIMELINE_BACKFILL]
+    write_entries([
+        TimelineEntry(
+            user_id=user_id, post_id=pk, author_id=author_id,
+            pub_date=pub_date,
+        )
+        for pk, pub_date in posts
+    ])
+
+
+def forget_author(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def follow_feed(user):
+    """
+    Лента подписок. Обычно это один проход по индексу
+    (user, pub_date, post) таблицы лент. Посты знаменитостей в ленты
+    не раскладываются и добираются при чтении по индексу (author, pub_date).
+    """
+    posts = Post.objects.select_related('author', 'group')
+    celebrities = list(
+        Follow.objects.filter(
+            user=user,
+            author__post_counter__followers_count__gte=(
+                settings.FOLLOW_FANOUT_LIMIT
+            ),
+        ).values_list('author_id', flat=True)
+    )
+    if not celebrities:
+        return posts.filter(timeline_entries__user=user).order_by(
+            F('timeline_entries__pub_date').desc(),
+            F('timeline_entries__post').desc(),
+        )
+    return posts.filter(
+        Q(pk__in=TimelineEntry.objects.filter(user=user).values('post'))
+        | Q(author_id__in=celebrities)
+    )
@@ -1,9 +1,11 @@
-from django.urls import path
+from django.urls import path, register_converter
 
-from . import views
+from . import converters, feeds, views
 
 app_name = 'posts'
 
+register_converter(converters.FeedFormatConverter, 'feed')
+
 urlpatterns = [
     path('', views.index, name='index'),
     path('create/', views.post_create, name='post_create'),
@@ -11,6 +13,16 @@ urlpatterns = [
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('profile/<str:username>/', views.profile, name='profile'),
-    # path('posts/<int:post_id>/comment/',
-    #      views.add_comment, name='add_comment'),
+    path('follow/', views.follow_index, name='follow_index'),
+    path('profile/<str:username>/follow/',
+         views.profile_follow, name='profile_follow'),
+    path('profile/<str:username>/unfollow/',
+         views.profile_unfollow, name='profile_unfollow'),
+    path('feed/<feed:fmt>/', feeds.index_feed, name='index_feed'),
+    path('group/<slug:slug>/feed/<feed:fmt>/',
+         feeds.group_feed, name='group_feed'),
+    path('profile/<str:username>/feed/<feed:fmt>/',
+         feeds.profile_feed, name='profile_feed'),
+    path('posts/<int:post_id>/comment/',
+         views.add_comment, name='add_comment'),
 ]
@@ -1,62 +1,140 @@
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
 
-from .forms import PostForm
-from .models import Group, Post, User
-
-
-def paginate_queryset(queryset, request):
-    paginator = Paginator(queryset, settings.COUNT_POST)
+from core.metrics import query_budget
+from core.uploads import upload_too_large
+
+from .archive import TieredPosts, find_post
+from .cache import FEED_TAG, anonymous_page_cache, author_tag, group_tag
+from .conditional import listing_condition, post_condition
+from .forms import CommentForm, PostForm
+from .hits import count_view, views_buffer
+from .models import (ArchivedPost, Comment, Follow, Group, Post, User,
+                     author_posts_count)
+from .paginators import CachedCountPaginator, CursorPaginator
+from .timeline import follow_feed
+
+# Поля, которые пишет правка поста. Счётчики comments_count и views
+# меняются через F() мимо экземпляра, и полная запись строки затёрла
+# бы комментарии и просмотры, пришедшие между чтением и сохранением.
+EDIT_FIELDS = PostForm.Meta.fields + ('version', 'updated_at')
+IMAGE_FIELDS = (
+    'image_width', 'image_height', 'image_bytes', 'thumbnail_widths'
+)
+
+
+def paginate_queryset(queryset, request, tags=()):
+    cursor = request.GET.get('cursor')
+    if cursor is not None or settings.CURSOR_PAGINATION:
+        return CursorPaginator(queryset, settings.COUNT_POST).get_page(cursor)
+    paginator = CachedCountPaginator(queryset, settings.COUNT_POST, tags)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
 
 
+@query_budget(5)
+@listing_condition(lambda: [FEED_TAG], lambda: [Post.objects.all()])
+@anonymous_page_cache(lambda: [FEED_TAG])
 def index(request):
     posts = Post.objects.select_related('group', 'author')
     context = {
         'posts': posts,
-        'page_obj': paginate_queryset(posts, request),
+        'page_obj': paginate_queryset(posts, request, [FEED_TAG]),
     }
     return render(request, 'posts/index.html', context)
 
 
+@query_budget(6)
+@listing_condition(
+    lambda slug: [group_tag(slug)],
+    lambda slug: [
+        Post.objects.filter(group__slug=slug),
+        ArchivedPost.objects.filter(group__slug=slug),
+    ],
+)
+@anonymous_page_cache(lambda slug: [group_tag(slug)])
 def group_list(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related('author')
+    posts = TieredPosts(
+        group.posts.select_related('author'),
+        group.archived_posts.select_related('author'),
+    )
     context = {
         'posts': posts,
         'group': group,
-        'page_obj': paginate_queryset(posts, request),
+        'page_obj': paginate_queryset(posts, request, [group_tag(slug)]),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@query_budget(7)
+@listing_condition(
+    lambda username: [author_tag(username)],
+    lambda username: [
+        Post.objects.filter(author__username=username),
+        ArchivedPost.objects.filter(author__username=username),
+    ],
+)
+@anonymous_page_cache(lambda username: [author_tag(username)])
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = Post.objects.filter(author=author)
-    posts_count = posts.count()
+    author = get_object_or_404(
+        User.objects.select_related('post_counter'), username=username
+    )
+    posts = TieredPosts(
+        author.posts.select_related('author', 'group'),
+        author.archived_posts.select_related('author', 'group'),
+    )
     context = {
         'author': author,
         'posts': posts,
-        'page_obj': paginate_queryset(posts, request),
-        'posts_count': posts_count,
+        'page_obj': paginate_queryset(
+            posts, request, [author_tag(username)]
+        ),
+        'posts_count': author_posts_count(author),
+        'following': (
+            request.user.is_authenticated
+            and Follow.objects.filter(
+                user=request.user, author=author
+            ).exists()
+        ),
     }
     return render(request, 'posts/profile.html', context)
 
 
+@query_budget(5)
+@count_view
+@post_condition
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = find_post(post_id, 'group', 'author__post_counter')
+    if post is None:
+        raise Http404
+    comments = Paginator(
+        Comment.objects.filter(post_id=post.pk).select_related('author'),
+        settings.COMMENTS_PER_PAGE,
+    ).get_page(request.GET.get('page'))
     context = {
         'post': post,
+        # Текущий просмотр count_view засчитает после ответа.
+        'views': post.views + views_buffer.pending(post.pk) + 1,
+        'is_archived': isinstance(post, ArchivedPost),
+        'posts_count': author_posts_count(post.author),
+        'comments': comments,
+        'form': CommentForm(),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@query_budget(3)
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(
+        request.POST or None,
+        files=request.FILES or None,
+        image_too_large=upload_too_large(request),
+    )
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
@@ -69,22 +147,26 @@ def post_create(request):
     return render(request, 'posts/create_post.html', context)
 
 
+@query_budget(4)
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
-    if post.author != request.user:
+    if post.author_id != request.user.pk:
         return redirect('posts:post_detail', post_id)
 
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
-        instance=post
+        instance=post,
+        image_too_large=upload_too_large(request),
     )
     if form.is_valid():
         post = form.save(commit=False)
-        post.save()
+        fields = EDIT_FIELDS
+        if 'image' in form.changed_data:
+            fields += IMAGE_FIELDS
+        post.save(update_fields=fields)
         return redirect('posts:post_detail', post_id=post_id)
-    form = PostForm(instance=post)
     context = {
         'post': post,
         'form': form,
@@ -93,13 +175,38 @@ def post_edit(request, post_id):
     return render(request, 'posts/create_post.html', context)
 
 
-# @login_required
-# def add_comment(request, post_id):
-#     # Получите пост
-#     form = CommentForm(request.POST or None)
-#     if form.is_valid():
-#         comment = form.save(commit=False)
-#         comment.author = request.user
-#         comment.post = post
-#         comment.save()
-#     return redirect('posts:post_detail', post_id=post_id)
+@query_budget(5)
+@login_required
+def follow_index(request):
+    context = {
+        'page_obj': paginate_queryset(follow_feed(request.user), request),
+    }
+    return render(request, 'posts/follow.html', context)
+
+
+@login_required
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect('posts:profile', username=username)
+
+
+@login_required
+def profile_unfollow(request, username):
+    Follow.objects.filter(
+        user=request.user, author__username=username
+    ).delete()
+    return redirect('posts:profile', username=username)
+
+
+@login_required
+def add_comment(request, post_id):
+    post = get_object_or_404(Post, pk=post_id)
+    form = CommentForm(request.POST or None)
+    if form.is_valid():
+        comment = form.save(commit=False)
+        comment.author = request.user
+        comment.post = post
+        comment.save()
+    return redirect('posts:post_detail', post_id=post_id)
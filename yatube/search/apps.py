@@ -0,0 +1,18 @@
+from django.apps import AppConfig, apps
+from django.db.models.signals import post_migrate
+
+
+def restore_triggers(sender, using, **kwargs):
+    from .index import ensure_triggers
+    ensure_triggers(using)
+
+
+class SearchConfig(AppConfig):
+    name = 'search'
+
+    def ready(self):
+        # post_migrate приходит только приложениям с моделями, а
+        # триггеры всё равно висят на таблице posts.
+        post_migrate.connect(
+            restore_triggers, sender=apps.get_app_config('posts')
+        )
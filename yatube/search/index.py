@@ -0,0 +1,139 @@
+import base64
+import binascii
+
+from django.db import connection, connections
+from django.db.models.expressions import RawSQL
+
+from posts.models import Post
+
+INDEX_TABLE = 'search_post'
+# На SQLite Django пересоздаёт posts_post при AddField/AlterField, и
+# триггеры пропадают вместе со старой таблицей; ensure_triggers
+# возвращает их после каждого migrate.
+TRIGGERS = {
+    'search_post_insert': (
+        "CREATE TRIGGER search_post_insert AFTER INSERT ON posts_post "
+        "BEGIN "
+        "INSERT INTO search_post(rowid, text) VALUES (new.id, new.text); "
+        "END"
+    ),
+    'search_post_delete': (
+        "CREATE TRIGGER search_post_delete AFTER DELETE ON posts_post "
+        "BEGIN "
+        "INSERT INTO search_post(search_post, rowid, text) "
+        "VALUES ('delete', old.id, old.text); "
+        "END"
+    ),
+    'search_post_update': (
+        "CREATE TRIGGER search_post_update AFTER UPDATE OF text "
+        "ON posts_post BEGIN "
+        "INSERT INTO search_post(search_post, rowid, text) "
+        "VALUES ('delete', old.id, old.text); "
+        "INSERT INTO search_post(rowid, text) VALUES (new.id, new.text); "
+        "END"
+    ),
+}
+
+
+def is_available():
+    return connection.vendor == 'sqlite'
+
+
+def ensure_triggers(using='default'):
+    """
+    Создаёт пропавшие триггеры индекса и, если такие были, заново
+    строит индекс: записи без триггеров в него не попали. Возвращает
+    имена созданных триггеров.
+    """
+    db = connections[using]
+    if db.vendor != 'sqlite':
+        return []
+    with db.cursor() as cursor:
+        cursor.execute(
+            "SELECT type, name FROM sqlite_master "
+            "WHERE name = %s OR tbl_name = 'posts_post'", [INDEX_TABLE]
+        )
+        existing = {name for kind, name in cursor.fetchall()}
+        if INDEX_TABLE not in existing:
+            return []
+        missing = [name for name in TRIGGERS if name not in existing]
+        for name in missing:
+            cursor.execute(TRIGGERS[name])
+        if missing:
+            cursor.execute(
+                f"INSERT INTO {INDEX_TABLE}({INDEX_TABLE}) VALUES ('rebuild')"
+            )
+    return missing
+
+
+def match_expression(query):
+    """Превращает пользовательский ввод в безопасное выражение MATCH."""
+    terms = [term.replace('"', '""') for term in query.split()]
+    return ' '.join(f'"{term}"' for term in terms)
+
+
+def encode_cursor(rank, pk):
+    raw = f'{rank!r}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padding = '=' * (-len(token) % 4)
+        rank, pk = base64.urlsafe_b64decode(token + padding).decode().split(
+            '|'
+        )
+        return float(rank), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def matching_ids(query):
+    """Подзапрос id постов, подходящих под query, для фильтра pk__in."""
+    return RawSQL(
+        f'SELECT rowid FROM {INDEX_TABLE} WHERE {INDEX_TABLE} MATCH %s',
+        (match_expression(query),),
+    )
+
+
+def search_posts(query, cursor=None, limit=10):
+    """
+    Возвращает (posts, next_cursor): посты, отсортированные по bm25,
+    и курсор следующей страницы по ключу (rank, id).
+    """
+    expression = match_expression(query)
+    if not expression:
+        return [], None
+    sql = f'SELECT rowid, rank FROM {INDEX_TABLE} WHERE {INDEX_TABLE} MATCH %s'
+    params = [expression]
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None:
+        sql += ' AND (rank > %s OR (rank = %s AND rowid > %s))'
+        params += [position[0], position[0], position[1]]
+    sql += ' ORDER BY rank, rowid LIMIT %s'
+    params.append(limit + 1)
+    with connection.cursor() as db:
+        db.execute(sql, params)
+        rows = db.fetchall()
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        [pk for pk, rank in rows]
+    )
+    found = [posts[pk] for pk, rank in rows if pk in posts]
+    next_cursor = encode_cursor(rows[-1][1], rows[-1][0]) if has_next else None
+    return found, next_cursor
+
+
+def rebuild():
+    with connection.cursor() as db:
+        db.execute(
+            f"INSERT INTO {INDEX_TABLE}({INDEX_TABLE}) VALUES ('rebuild')"
+        )
+
+
+def optimize():
+    with connection.cursor() as db:
+        db.execute(
+            f"INSERT INTO {INDEX_TABLE}({INDEX_TABLE}) VALUES ('optimize')"
+        )
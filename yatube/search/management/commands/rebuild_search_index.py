@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from search import index
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс постов (SQLite FTS5).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--optimize',
+            action='store_true',
+            help='После перестройки слить сегменты индекса.',
+        )
+
+    def handle(self, *args, **options):
+        if not index.is_available():
+            raise CommandError('Полнотекстовый индекс есть только в SQLite.')
+        index.rebuild()
+        if options['optimize']:
+            index.optimize()
+        self.stdout.write('Индекс перестроен.')
@@ -0,0 +1,50 @@
+from django.db import migrations
+
+CREATE_INDEX = (
+    "CREATE VIRTUAL TABLE search_post USING fts5("
+    "text, content='posts_post', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER search_post_insert AFTER INSERT ON posts_post BEGIN "
+    "INSERT INTO search_post(rowid, text) VALUES (new.id, new.text); "
+    "END",
+    "CREATE TRIGGER search_post_delete AFTER DELETE ON posts_post BEGIN "
+    "INSERT INTO search_post(search_post, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "END",
+    "CREATE TRIGGER search_post_update AFTER UPDATE OF text ON posts_post "
+    "BEGIN "
+    "INSERT INTO search_post(search_post, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "INSERT INTO search_post(rowid, text) VALUES (new.id, new.text); "
+    "END",
+    "INSERT INTO search_post(search_post) VALUES ('rebuild')",
+)
+
+DROP_INDEX = (
+    'DROP TRIGGER IF EXISTS search_post_update',
+    'DROP TRIGGER IF EXISTS search_post_delete',
+    'DROP TRIGGER IF EXISTS search_post_insert',
+    'DROP TABLE IF EXISTS search_post',
+)
+
+
+def run_sqlite(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_post_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_sqlite(CREATE_INDEX), run_sqlite(DROP_INDEX)
+        ),
+    ]
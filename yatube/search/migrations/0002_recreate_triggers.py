@@ -0,0 +1,45 @@
+from django.db import migrations
+
+# На SQLite Django пересоздаёт posts_post при AddField/AlterField, и
+# триггеры индекса пропадают вместе со старой таблицей. Миграция
+# восстанавливает их после posts 0009-0015 и заново строит индекс.
+# Дальше триггеры после каждого migrate возвращает обработчик
+# post_migrate (search.index.ensure_triggers).
+TRIGGERS = (
+    'DROP TRIGGER IF EXISTS search_post_insert',
+    'DROP TRIGGER IF EXISTS search_post_delete',
+    'DROP TRIGGER IF EXISTS search_post_update',
+    "CREATE TRIGGER search_post_insert AFTER INSERT ON posts_post BEGIN "
+    "INSERT INTO search_post(rowid, text) VALUES (new.id, new.text); "
+    "END",
+    "CREATE TRIGGER search_post_delete AFTER DELETE ON posts_post BEGIN "
+    "INSERT INTO search_post(search_post, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "END",
+    "CREATE TRIGGER search_post_update AFTER UPDATE OF text ON posts_post "
+    "BEGIN "
+    "INSERT INTO search_post(search_post, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "INSERT INTO search_post(rowid, text) VALUES (new.id, new.text); "
+    "END",
+    "INSERT INTO search_post(search_post) VALUES ('rebuild')",
+)
+
+
+def recreate_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in TRIGGERS:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+        ('posts', '0015_auto_20261018_2133'),
+    ]
+
+    operations = [
+        migrations.RunPython(recreate_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,108 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from search import index
+
+User = get_user_model()
+
+
+class SearchIndexTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='searcher')
+        cls.cat_post = Post.objects.create(
+            author=cls.user, text='Кошка спит на диване'
+        )
+        cls.cats_post = Post.objects.create(
+            author=cls.user, text='Кошка и кошка, две кошки'
+        )
+        cls.dog_post = Post.objects.create(
+            author=cls.user, text='Собака гуляет во дворе'
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.staff_client = Client()
+        self.staff_client.force_login(
+            User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        )
+
+    def test_index_follows_post_changes(self):
+        """Индекс обновляется триггерами при правке и удалении поста."""
+        self.assertEqual(len(index.search_posts('собака')[0]), 1)
+        post = Post.objects.get(pk=self.dog_post.pk)
+        post.text = 'Теперь тут про попугая'
+        post.save()
+        self.assertEqual(index.search_posts('собака')[0], [])
+        self.assertEqual(index.search_posts('ПОПУГАЯ')[0], [post])
+        post.delete()
+        self.assertEqual(index.search_posts('попугая')[0], [])
+
+    @override_settings(COUNT_POST=1)
+    def test_search_view_is_ranked_and_paginated(self):
+        """Поиск отдаёт результаты по релевантности с курсором."""
+        url = reverse('search:search')
+        response = self.guest_client.get(url, {'q': 'кошка'})
+        self.assertEqual(response.context['posts'], [self.cats_post])
+        response = self.guest_client.get(
+            url, {'q': 'кошка', 'cursor': response.context['next_cursor']}
+        )
+        self.assertEqual(response.context['posts'], [self.cat_post])
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_query_syntax_is_escaped(self):
+        """Служебные символы FTS5 в запросе не ломают поиск."""
+        response = self.guest_client.get(
+            reverse('search:search'), {'q': '"кошка AND (NOT'}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идёт через тот же индекс."""
+        response = self.staff_client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'собака'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.dog_post]
+        )
+
+    def test_rebuild_command_restores_index(self):
+        """rebuild_search_index заново наполняет индекс."""
+        with connection.cursor() as db:
+            db.execute(
+                "INSERT INTO search_post(search_post) VALUES ('delete-all')"
+            )
+        self.assertEqual(index.search_posts('собака')[0], [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(index.search_posts('собака')[0], [self.dog_post])
+
+    def test_migrate_restores_dropped_triggers(self):
+        """migrate возвращает пропавшие триггеры и перестраивает индекс."""
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER search_post_insert')
+        post = Post.objects.create(author=self.user, text='Пропавший носорог')
+        self.assertEqual(index.search_posts('носорог')[0], [])
+        call_command('migrate', verbosity=0)
+        self.assertEqual(index.search_posts('носорог')[0], [post])
+        self.assertEqual(index.ensure_triggers(), [])
+
+    def test_triggers_survive_full_migrate(self):
+        """После всех миграций posts триггеры индекса на месте."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master "
+                "WHERE type = 'trigger' AND tbl_name = 'posts_post'"
+            )
+            triggers = {row[0] for row in cursor.fetchall()}
+        self.assertEqual(
+            triggers,
+            {'search_post_insert', 'search_post_delete',
+             'search_post_update'},
+        )
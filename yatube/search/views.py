@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.shortcuts import render
+
+from core.metrics import query_budget
+
+from . import index
+
+
+@query_budget(4)
+def search(request):
+    query = request.GET.get('q', '').strip()
+    posts, next_cursor = [], None
+    if query:
+        posts, next_cursor = index.search_posts(
+            query, request.GET.get('cursor'), settings.COUNT_POST
+        )
+    context = {
+        'query': query,
+        'posts': posts,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'search/search.html', context)
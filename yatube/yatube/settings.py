@@ -1,7 +1,12 @@
 import os
+import sys
 
 COUNT_POST = 10
 
+COMMENTS_PER_PAGE = 20
+
+CURSOR_PAGINATION = False
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 SECRET_KEY = '%_758b8mg(i&jws1#0+@6#vzm8nr4_ld0hav@bey^s#l=$+9xq'
@@ -19,12 +24,19 @@ ALLOWED_HOSTS = [
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Отдача медиа фронтовым сервером: '' (стримит Django),
+# 'x-accel-redirect' (nginx, internal location MEDIA_ACCEL_PREFIX)
+# или 'x-sendfile' (Apache mod_xsendfile, lighttpd).
+MEDIA_ACCEL = ''
+MEDIA_ACCEL_PREFIX = '/internal-media/'
+MEDIA_CACHE_SECONDS = 60 * 60
 
 INSTALLED_APPS = [
     'about.apps.AboutConfig',
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
+    'search.apps.SearchConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -35,21 +47,45 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
+    'core.middleware.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.AdmissionControlMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Допуск запросов (core.middleware.AdmissionControlMiddleware):
+# (токенов в секунду, ёмкость корзины) по IP и пользователю и число
+# одновременных запросов на процесс. Запись - небезопасные методы
+# и маршруты из ADMISSION_WRITE_VIEWS, которые пишут и на GET.
+# За прокси вместо REMOTE_ADDR укажите заголовок с адресом клиента,
+# например 'HTTP_X_REAL_IP'. В отладке выключено.
+ADMISSION_ENABLED = not DEBUG
+ADMISSION_LIMITS = {
+    'read': {'ip': (20, 100), 'concurrency': 32},
+    'write': {'ip': (2, 30), 'user': (0.5, 10), 'concurrency': 2},
+}
+ADMISSION_WRITE_VIEWS = (
+    'posts:profile_follow', 'posts:profile_unfollow', 'users:logout',
+)
+ADMISSION_IP_HEADER = 'REMOTE_ADDR'
+ADMISSION_MAX_KEYS = 100000
+ADMISSION_RETRY_AFTER = 1
+
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+# Без DEBUG Django сам оборачивает загрузчики в cached.Loader.
+# Бэкенд - DjangoTemplates с замером времени рендера для метрик.
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.metrics.TimedDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -66,14 +102,118 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Сессии читаются из кэша и пишутся сквозь него в БД (см.
+# core.sessions). Срок жизни продлевается на каждом запросе, но в базу
+# это попадает не чаще раза в SESSION_REFRESH_INTERVAL. Кэш должен быть
+# общим для всех процессов (memcached, redis): в LocMemCache каждого
+# процесса осталась бы своя копия сессии, и выход или смена данных
+# в одном процессе не видны другим. Без общего кэша сессии хранятся
+# в БД и не продлеваются на каждом запросе.
+SHARED_CACHE = CACHES['default']['BACKEND'] not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+if SHARED_CACHE:
+    SESSION_ENGINE = 'core.sessions'
+    SESSION_SAVE_EVERY_REQUEST = True
+SESSION_REFRESH_INTERVAL = 60 * 60
+
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Страницы анонимам и число постов для пагинации кэшируются под
+# версиями тегов, а теги сбрасывает только процесс, принявший запись.
+# С LocMemCache остальные процессы отдавали бы устаревшие ленты,
+# поэтому без общего кэша этот кэш выключен. Карточкам постов общий
+# кэш не нужен: их ключ содержит версию поста из базы.
+PAGE_CACHE = SHARED_CACHE
+PAGE_CACHE_TIMEOUT = 60 * 5
+
+# Число постов для нумерованной пагинации кэшируется под версиями
+# тегов ленты; в таблице больше PAGE_COUNT_ESTIMATE_ABOVE строк
+# вместо COUNT(*) берётся оценка из sqlite_stat1.
+PAGE_COUNT_TIMEOUT = 60 * 10
+PAGE_COUNT_ESTIMATE_ABOVE = 100000
+
+FEED_SIZE = 50
+
+FEED_CHUNK_SIZE = 20
+
+# Под тестами задачи выполняются на месте: процессы пула подняли бы
+# настройки заново и открыли бы db.sqlite3 вместо тестовой базы.
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+TASKS_EAGER = TESTING
+
+# Просмотры постов копятся в памяти (posts.hits) и пишутся в базу
+# раз в VIEW_FLUSH_INTERVAL секунд или после VIEW_FLUSH_THRESHOLD
+# просмотров. Журнал на локальном диске позволяет досчитать их после
+# падения процесса; без него теряется не больше одного буфера. Поток
+# VIEW_FLUSH_THREAD сбрасывает буфер и без запросов, а также при выходе.
+VIEW_FLUSH_THREAD = not TESTING
+VIEW_FLUSH_INTERVAL = 30
+VIEW_FLUSH_THRESHOLD = 1000
+VIEW_JOURNAL_DIR = None if DEBUG else os.path.join(BASE_DIR, 'journal')
+
+TASK_PROCESS_WORKERS = 2
+
+# Загрузки пишутся на диск кусками; больше MAX_UPLOAD_SIZE не принимаем.
+FILE_UPLOAD_HANDLERS = ['core.uploads.LimitedUploadHandler']
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+IMAGE_MAX_SIZE = 1920
+IMAGE_JPEG_QUALITY = 85
+
+# Ширины адаптивных миниатюр поста, кадр в пропорциях 960x339.
+POST_IMAGE_WIDTHS = (320, 640, 960, 1280)
+POST_IMAGE_ASPECT = (960, 339)
+
 
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        'CONN_MAX_AGE': 600,
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db_replica.sqlite3'),
+        'CONN_MAX_AGE': 600,
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
 }
 
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+
+# Реплики для чтения, например ['replica'] после manage.py sync_replicas.
+DATABASE_REPLICAS = []
+
+REPLICA_PIN_SECONDS = 10
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+}
+
+SQLITE_OPTIMIZE_INTERVAL = 60 * 60
+
+ARCHIVE_AFTER_DAYS = 90
+
+# Подписчикам авторов с числом подписчиков от FOLLOW_FANOUT_LIMIT
+# посты не раскладываются в ленты, а читаются при запросе.
+FOLLOW_FANOUT_LIMIT = 1000
+FANOUT_BATCH_SIZE = 1000
+TIMELINE_BACKFILL = 50
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {